@@ -5,6 +5,8 @@ from sqlalchemy import engine_from_config, pool
 from alembic import context
 from sqlmodel import SQLModel
 from app.models.user import User  # noqa (import to register model)
+from app.models.session import RefreshSession  # noqa (import to register model)
+from app.models.signing_key import SigningKey  # noqa (import to register model)
 from app.core.settings import settings
 
 # this is the Alembic Config object, which provides
@@ -0,0 +1,80 @@
+"""add refresh sessions
+
+Revision ID: 4f2a9c1d7e3b
+Revises: 8b965a9fabc3
+Create Date: 2026-10-17 11:05:12.418306
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f2a9c1d7e3b"
+down_revision: Union[str, Sequence[str], None] = "8b965a9fabc3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "refresh_sessions",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(length=26), nullable=False),
+        sa.Column(
+            "user_id", sqlmodel.sql.sqltypes.AutoString(length=26), nullable=False
+        ),
+        sa.Column(
+            "token_hash", sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False
+        ),
+        sa.Column("device", sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_refresh_sessions_token_hash"),
+        "refresh_sessions",
+        ["token_hash"],
+        unique=True,
+    )
+    op.create_index(
+        op.f("ix_refresh_sessions_user_id"),
+        "refresh_sessions",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_refresh_sessions_expires_at"),
+        "refresh_sessions",
+        ["expires_at"],
+        unique=False,
+    )
+
+    # Refresh tokens now live in refresh_sessions; existing ones are dropped
+    # and users sign in again once their access token expires.
+    op.drop_column("users", "refresh_token")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column(
+            "refresh_token", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+    )
+    op.drop_index(
+        op.f("ix_refresh_sessions_expires_at"), table_name="refresh_sessions"
+    )
+    op.drop_index(op.f("ix_refresh_sessions_user_id"), table_name="refresh_sessions")
+    op.drop_index(
+        op.f("ix_refresh_sessions_token_hash"), table_name="refresh_sessions"
+    )
+    op.drop_table("refresh_sessions")
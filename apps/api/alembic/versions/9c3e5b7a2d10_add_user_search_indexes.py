@@ -0,0 +1,81 @@
+"""add user search indexes
+
+Revision ID: 9c3e5b7a2d10
+Revises: 4f2a9c1d7e3b
+Create Date: 2026-10-17 14:22:47.093512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c3e5b7a2d10"
+down_revision: Union[str, Sequence[str], None] = "4f2a9c1d7e3b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and keeps
+    # users writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_users_email_lower_prefix",
+            "users",
+            [sa.text("lower(email) text_pattern_ops")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_username_lower_prefix",
+            "users",
+            [sa.text("lower(username) text_pattern_ops")],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_users_inactive",
+            "users",
+            ["id"],
+            unique=False,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text("NOT is_active"),
+        )
+        op.create_index(
+            "ix_users_oauth_provider",
+            "users",
+            ["oauth_provider", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            postgresql_where=sa.text("oauth_provider IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_users_oauth_provider",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_inactive",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_username_lower_prefix",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_users_email_lower_prefix",
+            table_name="users",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,34 @@
+"""add refresh session revoked reason
+
+Revision ID: e3a7c1f9b254
+Revises: b71d0e4c8a25
+Create Date: 2026-10-17 19:12:36.804215
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a7c1f9b254"
+down_revision: Union[str, Sequence[str], None] = "b71d0e4c8a25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sessions revoked before this revision keep a NULL reason, so their
+    # tokens are rejected on reuse without revoking the other sessions
+    op.add_column(
+        "refresh_sessions",
+        sa.Column("revoked_reason", sa.String(length=16), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("refresh_sessions", "revoked_reason")
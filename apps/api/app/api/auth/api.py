@@ -1,27 +1,38 @@
 from typing import Annotated
-from fastapi import APIRouter, Depends, status, Query, HTTPException
+from fastapi import APIRouter, Depends, status, Query, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models.database import get_db
-from app.models.user import User
+from app.models.database import engine, get_db
+from app.models.user import Permission, User, UserRole
+from app.modules.auth.principal import Principal
 from app.modules.auth.service import (
     create_user,
     authenticate_user,
     create_tokens_for_user,
     refresh_access_token,
+    revoke_refresh_token,
+    revoke_user_tokens,
+    optional_oauth2_scheme,
     get_current_user,
     get_current_admin,
-    get_user_by_id,
+    require_permissions,
+    get_users_by_ids_or_usernames,
     update_user_profile,
+    update_user_role as change_user_role,
 )
-from app.modules.auth.oauth_service import (
-    handle_google_callback,
-    handle_github_callback,
-    get_google_auth_url,
-    get_github_auth_url,
+from app.modules.auth.admin_service import (
+    approximate_user_count,
+    bulk_update_role,
+    list_users_page,
+    parse_fields,
+    search_filters,
 )
+from app.modules.auth.export import EXPORT_FORMATS, export_users
+from app.modules.auth.oauth_service import get_auth_url, handle_oauth_callback
+from app.modules.auth.providers import PROVIDERS, OAuthProvider
+from app.modules.auth.throttle import login_throttle
 from .serializer import (
     UserCreate,
     UserResponse,
@@ -31,8 +42,11 @@ from .serializer import (
     OAuthUrlResponse,
     UserRoleUpdate,
     UserProfileUpdate,
+    UserPage,
+    BulkRoleUpdate,
+    BulkRoleUpdateResult,
+    UserBatchLookup,
 )
-from sqlmodel import select
 from app.core.settings import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -50,11 +64,18 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     db: AsyncSession = Depends(get_db),
 ):
+    # Throttled before any database or password hashing work
+    client_ip = request.client.host if request.client else "unknown"
+    await login_throttle.check(client_ip, form_data.username)
     user = await authenticate_user(db, form_data.username, form_data.password)
-    tokens = await create_tokens_for_user(db, user)
+    await login_throttle.succeeded(client_ip, form_data.username)
+    tokens = await create_tokens_for_user(
+        db, user, device=request.headers.get("user-agent")
+    )
     return tokens
 
 
@@ -85,53 +106,67 @@ async def refresh_token(
     return tokens
 
 
-@router.get("/google", response_model=OAuthUrlResponse)
-async def google_oauth_init():
-    """Initiate Google OAuth flow"""
-    auth_url = get_google_auth_url()
-    return {"auth_url": auth_url}
-
-
-@router.get("/google/callback")
-async def google_oauth_callback(
-    code: str = Query(...),
-    state: str | None = None,
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    refresh_data: RefreshTokenRequest,
+    access_token: Annotated[str | None, Depends(optional_oauth2_scheme)],
     db: AsyncSession = Depends(get_db),
 ):
-    """Handle Google OAuth callback"""
-    user = await handle_google_callback(db, code)
-    tokens = await create_tokens_for_user(db, user)
+    """
+    Revoke the refresh session of the given refresh token, and the bearer
+    access token if one is sent.
+    """
+    await revoke_refresh_token(db, refresh_data.refresh_token, access_token)
 
-    redirect_url = f"{settings.frontend_url}/auth/callback?access_token={tokens['access_token']}&refresh_token={tokens['refresh_token']}"
-    return RedirectResponse(url=redirect_url)
 
+def _add_oauth_routes(provider: OAuthProvider):
+    """Register the init and callback routes of an OAuth provider."""
 
-@router.get("/github", response_model=OAuthUrlResponse)
-async def github_oauth_init():
-    """Initiate GitHub OAuth flow"""
-    auth_url = get_github_auth_url()
-    return {"auth_url": auth_url}
+    async def oauth_init():
+        return {"auth_url": get_auth_url(provider)}
 
+    async def oauth_callback(
+        request: Request,
+        code: str = Query(...),
+        state: str | None = None,
+        db: AsyncSession = Depends(get_db),
+    ):
+        user = await handle_oauth_callback(db, provider, code)
+        tokens = await create_tokens_for_user(
+            db, user, device=request.headers.get("user-agent")
+        )
+
+        redirect_url = f"{settings.frontend_url}/auth/callback?access_token={tokens['access_token']}&refresh_token={tokens['refresh_token']}"
+        return RedirectResponse(url=redirect_url)
+
+    router.add_api_route(
+        f"/{provider.name}",
+        oauth_init,
+        methods=["GET"],
+        response_model=OAuthUrlResponse,
+        name=f"{provider.name}_oauth_init",
+        description=f"Initiate {provider.title} OAuth flow",
+    )
+    router.add_api_route(
+        f"/{provider.name}/callback",
+        oauth_callback,
+        methods=["GET"],
+        name=f"{provider.name}_oauth_callback",
+        description=f"Handle {provider.title} OAuth callback",
+    )
 
-@router.get("/github/callback")
-async def github_oauth_callback(
-    code: str = Query(...),
-    state: str | None = None,
-    db: AsyncSession = Depends(get_db),
-):
-    """Handle GitHub OAuth callback"""
-    user = await handle_github_callback(db, code)
-    tokens = await create_tokens_for_user(db, user)
 
-    redirect_url = f"{settings.frontend_url}/auth/callback?access_token={tokens['access_token']}&refresh_token={tokens['refresh_token']}"
-    return RedirectResponse(url=redirect_url)
+for _provider in PROVIDERS.values():
+    _add_oauth_routes(_provider)
 
 
 # Admin endpoints
 
 
 @router.get("/admin/test", response_model=dict)
-async def test_admin_access(admin_user: Annotated[User, Depends(get_current_admin)]):
+async def test_admin_access(
+    admin_user: Annotated[User | Principal, Depends(get_current_admin)],
+):
     """Test endpoint to verify admin access."""
     return {
         "message": "Admin access granted",
@@ -143,33 +178,166 @@ async def test_admin_access(admin_user: Annotated[User, Depends(get_current_admi
     }
 
 
-@router.get("/users", response_model=list[UserResponse])
+@router.get("/users", response_model=UserPage)
 async def list_users(
-    admin_user: Annotated[User, Depends(get_current_admin)],
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_LIST))
+    ],
+    cursor: str | None = None,
+    limit: int = Query(settings.users_page_size, ge=1, le=settings.users_page_size_max),
+    fields: str | None = Query(
+        None, description="Comma-separated columns to return (default: all)"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all users (admin only)."""
-    result = await db.exec(select(User))
-    users = result.all()
-    return users
+    """List users page by page (admin only)."""
+    items, next_cursor = await list_users_page(
+        db, parse_fields(fields), cursor=cursor, limit=limit
+    )
+    return {
+        "items": items,
+        "next_cursor": next_cursor,
+        "approximate_total": await approximate_user_count(db),
+    }
+
+
+@router.get("/users/search", response_model=UserPage)
+async def search_users(
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_LIST))
+    ],
+    role: UserRole | None = None,
+    is_active: bool | None = None,
+    oauth_provider: str | None = None,
+    email: str | None = Query(None, description="Case-insensitive email prefix"),
+    username: str | None = Query(None, description="Case-insensitive username prefix"),
+    cursor: str | None = None,
+    limit: int = Query(settings.users_page_size, ge=1, le=settings.users_page_size_max),
+    fields: str | None = Query(
+        None, description="Comma-separated columns to return (default: all)"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Search users by role, status, OAuth provider or email/username prefix.
+
+    Admin only.
+    """
+    filters = search_filters(
+        role=role,
+        is_active=is_active,
+        oauth_provider=oauth_provider,
+        email=email,
+        username=username,
+    )
+    items, next_cursor = await list_users_page(
+        db, parse_fields(fields), cursor=cursor, limit=limit, filters=filters
+    )
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.post("/users/batch", response_model=dict[str, UserResponse])
+async def batch_lookup_users(
+    lookup: UserBatchLookup,
+    current_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_LOOKUP))
+    ],
+    db: AsyncSession = Depends(get_db),
+):
+    """Resolve many users by ID and/or username, keyed by ID (moderator or admin)."""
+    if len(lookup.ids) + len(lookup.usernames) > settings.users_batch_lookup_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"At most {settings.users_batch_lookup_max} IDs and usernames "
+                "per request"
+            ),
+        )
+    return await get_users_by_ids_or_usernames(db, lookup.ids, lookup.usernames)
+
+
+@router.get("/users/export")
+async def export_users_endpoint(
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_EXPORT))
+    ],
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    fields: str | None = Query(
+        None, description="Comma-separated columns to export (default: all)"
+    ),
+):
+    """Stream every user as NDJSON or CSV (admin only)."""
+    filename = f"users.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_users(
+            engine,
+            parse_fields(fields),
+            fmt=format,
+            compress=gzip,
+            chunk_size=settings.users_export_chunk_size,
+        ),
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.patch("/users/role", response_model=BulkRoleUpdateResult)
+async def bulk_update_user_role(
+    role_update: BulkRoleUpdate,
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_MANAGE_ROLES))
+    ],
+    db: AsyncSession = Depends(get_db),
+):
+    """Change the role of many users by ID list or search filter (admin only)."""
+    criteria = (
+        role_update.filter.model_dump(exclude_none=True) if role_update.filter else {}
+    )
+    # Checked on the built conditions: blank prefixes add none, and an empty
+    # filter would select every user
+    filters = search_filters(**criteria)
+    if (role_update.user_ids is None) == (not filters):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either user_ids or a non-empty filter",
+        )
+
+    updated, not_found = await bulk_update_role(
+        db,
+        role_update.role,
+        user_ids=role_update.user_ids,
+        filters=filters,
+    )
+    return {"updated": updated, "not_found": not_found}
 
 
 @router.patch("/users/{user_id}/role", response_model=UserResponse)
 async def update_user_role(
     user_id: str,
     role_update: UserRoleUpdate,
-    admin_user: Annotated[User, Depends(get_current_admin)],
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_MANAGE_ROLES))
+    ],
     db: AsyncSession = Depends(get_db),
 ):
     """Update user role (admin only)."""
-    user = await get_user_by_id(db, user_id)
+    user = await change_user_role(db, user_id, role_update.role)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found",
         )
-
-    user.role = role_update.role
-    await db.commit()
-    await db.refresh(user)
     return user
+
+
+@router.post("/users/{user_id}/revoke-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke_tokens(
+    user_id: str,
+    admin_user: Annotated[
+        User | Principal, Depends(require_permissions(Permission.USERS_REVOKE_TOKENS))
+    ],
+    db: AsyncSession = Depends(get_db),
+):
+    """Sign a user out of every session, including issued access tokens (admin only)."""
+    await revoke_user_tokens(db, user_id)
@@ -1,6 +1,6 @@
 from sqlmodel import SQLModel
 from pydantic import EmailStr
-from typing import Optional
+from typing import Any, Optional
 from app.models.user import UserRole
 
 
@@ -33,6 +33,14 @@ class UserResponse(UserBase):
     model_config = {"from_attributes": True}
 
 
+class UserPage(SQLModel):
+    """One page of users; items contain only the requested fields"""
+
+    items: list[dict[str, Any]]
+    next_cursor: Optional[str] = None
+    approximate_total: Optional[int] = None
+
+
 # --- OAuth Schemas ---
 
 
@@ -59,18 +67,51 @@ class RefreshTokenRequest(SQLModel):
 
 class AccessTokenResponse(SQLModel):
     access_token: str
+    refresh_token: str
     token_type: str
 
 
 # --- Role Management Schemas ---
 
 
+class UserBatchLookup(SQLModel):
+    """Schema for resolving many users by ID and/or username"""
+
+    ids: list[str] = []
+    usernames: list[str] = []
+
+
 class UserRoleUpdate(SQLModel):
     """Schema for updating user role (admin only)"""
 
     role: UserRole
 
 
+class UserSearchFilter(SQLModel):
+    """Criteria selecting users, as accepted by the admin search endpoint"""
+
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+    oauth_provider: Optional[str] = None
+    email: Optional[str] = None
+    username: Optional[str] = None
+
+
+class BulkRoleUpdate(SQLModel):
+    """Schema for changing the role of many users at once (admin only)"""
+
+    role: UserRole
+    user_ids: Optional[list[str]] = None
+    filter: Optional[UserSearchFilter] = None
+
+
+class BulkRoleUpdateResult(SQLModel):
+    """IDs whose role was changed, and requested IDs that do not exist"""
+
+    updated: list[str]
+    not_found: list[str] = []
+
+
 # --- Profile Management Schemas ---
 
 
@@ -13,9 +13,10 @@ from getpass import getpass
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.exceptions import UserAlreadyExistsException
 from app.core.settings import settings
 from app.models.user import UserRole
-from app.modules.auth.service import check_user_exists, create_user
+from app.modules.auth.service import create_user
 
 
 async def create_superuser():
@@ -50,13 +51,6 @@ async def create_superuser():
     engine = create_async_engine(settings.database_url, echo=False)
 
     async with AsyncSession(engine) as db:
-        # Check if user exists
-        if await check_user_exists(db, email, username):
-            print(
-                f"Error: User with email '{email}' or username '{username}' already exists"
-            )
-            sys.exit(1)
-
         # Create admin user
         try:
             user = await create_user(
@@ -74,6 +68,11 @@ async def create_superuser():
             print(f"  Username: {user.username}")
             print(f"  Role: {user.role.value}")
             print("=" * 50)
+        except UserAlreadyExistsException:
+            print(
+                f"Error: User with email '{email}' or username '{username}' already exists"
+            )
+            sys.exit(1)
         except Exception as e:
             print(f"Error creating superuser: {e}")
             sys.exit(1)
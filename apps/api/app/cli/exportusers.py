@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Export all users as NDJSON or CSV.
+
+Rows are read in keyset-paginated chunks, so memory use stays flat
+regardless of the number of users.
+
+Usage:
+    moon run api:exportusers -- -o users.ndjson
+    moon run api:exportusers -- --format csv --gzip -o users.csv.gz
+"""
+
+import argparse
+import asyncio
+import sys
+
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.settings import settings
+from app.modules.auth.admin_service import USER_LIST_FIELDS, parse_fields
+from app.modules.auth.export import EXPORT_FORMATS, export_users
+
+
+async def run_export(args: argparse.Namespace):
+    engine = create_async_engine(settings.database_url, echo=False)
+    if args.output:
+        output = await asyncio.to_thread(open, args.output, "wb")
+    else:
+        output = sys.stdout.buffer
+
+    try:
+        async for chunk in export_users(
+            engine,
+            parse_fields(args.fields),
+            fmt=args.format,
+            compress=args.gzip,
+            chunk_size=args.chunk_size,
+        ):
+            # Disk writes would otherwise block the event loop
+            await asyncio.to_thread(output.write, chunk)
+    finally:
+        if args.output:
+            await asyncio.to_thread(output.close)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export users")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument(
+        "--fields", help=f"Comma-separated subset of: {', '.join(USER_LIST_FIELDS)}"
+    )
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    asyncio.run(run_export(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Bulk user import from CSV or JSONL.
+
+Each record needs `email`, `username` and either `password` (hashed here)
+or `hashed_password` (a bcrypt hash carried over from another system).
+Optional fields: `full_name`, `role`, `is_active`.
+
+Passwords are hashed across a process pool while the previous batch is
+loaded. Batches are COPYed into a temporary table and moved into `users`
+with INSERT ... ON CONFLICT DO NOTHING. Each committed batch is recorded
+in a checkpoint file, so an interrupted import resumes where it stopped.
+Rows that are skipped (malformed, invalid or already registered) go to a
+conflict report once their batch is checkpointed.
+
+Usage:
+    moon run api:importusers -- users.csv
+    moon run api:importusers -- users.jsonl --batch-size 10000 --workers 8
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import asyncpg
+from pydantic import (
+    BaseModel,
+    EmailStr,
+    Field,
+    ValidationError,
+    field_validator,
+    model_validator,
+)
+from ulid import ULID
+
+from app.core.security import get_password_hash
+from app.core.settings import settings
+from app.models.user import UserRole
+
+COLUMNS = (
+    "id",
+    "email",
+    "username",
+    "hashed_password",
+    "full_name",
+    "role",
+    "is_active",
+)
+
+STAGING_TABLE = """
+CREATE TEMPORARY TABLE users_import (
+    line integer NOT NULL,
+    id varchar(26) NOT NULL,
+    email varchar NOT NULL,
+    username varchar NOT NULL,
+    hashed_password varchar NOT NULL,
+    full_name varchar,
+    role text NOT NULL,
+    is_active boolean NOT NULL
+) ON COMMIT DROP
+"""
+
+MERGE_STAGED = """
+INSERT INTO users (id, email, username, hashed_password, full_name, role, is_active)
+SELECT id, email, username, hashed_password, full_name, role::userrole, is_active
+FROM users_import
+ORDER BY line
+ON CONFLICT DO NOTHING
+RETURNING id
+"""
+
+
+def _iter_records(path: Path, fmt: str) -> Iterator[tuple[int, dict | None]]:
+    """Yield (line number, record) pairs; malformed JSONL records are None."""
+    with path.open(newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            # Line 1 is the header
+            for line, record in enumerate(csv.DictReader(f), start=2):
+                yield line, record
+        else:
+            for line, raw in enumerate(f, start=1):
+                if not raw.strip():
+                    continue
+                try:
+                    record = json.loads(raw)
+                except json.JSONDecodeError:
+                    record = None
+                yield line, record if isinstance(record, dict) else None
+
+
+def _hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash a chunk of passwords (runs in a worker process)."""
+    return [get_password_hash(password) for password in passwords]
+
+
+class ImportRecord(BaseModel):
+    """One input record; anything that does not validate is skipped."""
+
+    email: EmailStr
+    username: str = Field(min_length=1, max_length=255)
+    password: str | None = None
+    hashed_password: str | None = None
+    full_name: str | None = None
+    role: UserRole | None = None
+    is_active: bool | None = None
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _blank_to_none(cls, value):
+        # Empty CSV cells (and blank JSON strings) mean "not given"
+        if isinstance(value, str) and not value.strip():
+            return None
+        return value
+
+    @model_validator(mode="after")
+    def _has_password(self):
+        if not self.password and not self.hashed_password:
+            raise ValueError("missing password")
+        return self
+
+
+def _validation_reason(error: ValidationError) -> str:
+    first = error.errors()[0]
+    message = first["msg"].removeprefix("Value error, ")
+    if not first["loc"]:
+        return message
+    return f"invalid {first['loc'][0]}: {message}"
+
+
+class Checkpoint:
+    """Number of input records already committed, persisted atomically."""
+
+    def __init__(self, path: Path, source: Path):
+        self.path = path
+        self.source = str(source.resolve())
+        self.done = 0
+        if path.exists():
+            state = json.loads(path.read_text())
+            if state.get("source") == self.source:
+                self.done = state["records_done"]
+
+    def save(self, done: int):
+        self.done = done
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"source": self.source, "records_done": done}))
+        os.replace(tmp, self.path)
+
+
+class ConflictReport:
+    """CSV report of input records that were not imported."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        exists = path.exists()
+        self._file = path.open("a", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+        if not exists:
+            self._writer.writerow(["line", "email", "username", "reason"])
+        self.count = 0
+
+    def add_many(self, skipped: list[tuple[int, dict, str]]):
+        """Write (line, record, reason) rows and flush them to disk."""
+        for line, record, reason in sorted(skipped, key=lambda row: row[0]):
+            self._writer.writerow(
+                [line, record.get("email", ""), record.get("username", ""), reason]
+            )
+        self._file.flush()
+        self.count += len(skipped)
+
+    def close(self):
+        self._file.close()
+
+
+def _prepare_batch(
+    records: list[tuple[int, dict | None]],
+) -> tuple[
+    list[tuple[int, dict, ImportRecord]], list[str], list[tuple[int, dict, str]]
+]:
+    """
+    Validate a batch and collect the plain passwords that need hashing.
+
+    Returns the valid records (with their parsed form), their passwords and
+    the skipped records.
+    """
+    valid = []
+    passwords = []
+    skipped = []
+    for line, record in records:
+        if record is None:
+            skipped.append((line, {}, "malformed JSON record"))
+            continue
+        try:
+            user = ImportRecord.model_validate(record)
+        except ValidationError as e:
+            skipped.append((line, record, _validation_reason(e)))
+            continue
+        if not user.hashed_password:
+            passwords.append(user.password)
+        valid.append((line, record, user))
+    return valid, passwords, skipped
+
+
+async def _hash_batch(
+    pool: ProcessPoolExecutor, passwords: list[str], workers: int
+) -> list[str]:
+    """Hash passwords in one chunk per worker to keep IPC overhead low."""
+    if not passwords:
+        return []
+    loop = asyncio.get_running_loop()
+    size = max(1, -(-len(passwords) // workers))
+    chunks = [passwords[i : i + size] for i in range(0, len(passwords), size)]
+    results = await asyncio.gather(
+        *[loop.run_in_executor(pool, _hash_passwords, chunk) for chunk in chunks]
+    )
+    return [hashed for chunk in results for hashed in chunk]
+
+
+async def _load_batch(
+    conn: asyncpg.Connection,
+    valid: list[tuple[int, dict, ImportRecord]],
+    hashes: list[str],
+    default_role: UserRole,
+) -> tuple[int, list[tuple[int, dict, str]]]:
+    """
+    COPY a batch into a staging table and merge it into users.
+
+    Returns the number of users inserted and the records that conflicted
+    with existing users.
+    """
+    hashes_iter = iter(hashes)
+    rows = []
+    for line, _, user in valid:
+        rows.append(
+            (
+                line,
+                str(ULID()),
+                user.email,
+                user.username,
+                user.hashed_password or next(hashes_iter),
+                user.full_name,
+                (user.role or default_role).value,
+                True if user.is_active is None else user.is_active,
+            )
+        )
+
+    async with conn.transaction():
+        await conn.execute(STAGING_TABLE)
+        await conn.copy_records_to_table(
+            "users_import", records=rows, columns=("line", *COLUMNS)
+        )
+        inserted = {row["id"] for row in await conn.fetch(MERGE_STAGED)}
+
+    duplicates = [
+        (line, record, "email or username already registered")
+        for row, (line, record, _) in zip(rows, valid)
+        if row[1] not in inserted
+    ]
+    return len(inserted), duplicates
+
+
+def _batched(
+    records: Iterator[tuple[int, dict | None]], size: int
+) -> Iterator[list[tuple[int, dict | None]]]:
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def import_users(args: argparse.Namespace):
+    source = Path(args.file)
+    fmt = args.format or ("jsonl" if source.suffix in (".jsonl", ".ndjson") else "csv")
+    default_role = UserRole(args.role)
+    workers = args.workers or os.cpu_count() or 1
+
+    checkpoint = Checkpoint(Path(args.checkpoint or f"{source}.checkpoint"), source)
+    conflicts = ConflictReport(Path(args.conflicts or f"{source}.conflicts.csv"))
+
+    records = _iter_records(source, fmt)
+    for _ in range(checkpoint.done):
+        next(records, None)
+    if checkpoint.done:
+        print(f"Resuming after {checkpoint.done} records")
+
+    conn = await asyncpg.connect(settings.database_url.replace("+asyncpg", ""))
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    resumed_from = processed = checkpoint.done
+    inserted = 0
+    started = time.monotonic()
+    try:
+        batches = _batched(records, args.batch_size)
+        pending = None  # (batch size, valid records, skipped records, hashing task)
+
+        while True:
+            # Hash the next batch while the current one is being loaded
+            batch = next(batches, None)
+            upcoming = None
+            if batch is not None:
+                valid, passwords, skipped = _prepare_batch(batch)
+                hashing = asyncio.create_task(_hash_batch(pool, passwords, workers))
+                upcoming = (len(batch), valid, skipped, hashing)
+
+            if pending is not None:
+                size, valid, skipped, hashing = pending
+                hashes = await hashing
+                loaded, duplicates = await _load_batch(
+                    conn, valid, hashes, default_role
+                )
+                inserted += loaded
+                processed += size
+                checkpoint.save(processed)
+                # Only reported once the batch is checkpointed, so a resumed
+                # import does not report the same records again
+                conflicts.add_many(skipped + duplicates)
+
+                elapsed = time.monotonic() - started
+                rate = (processed - resumed_from) / elapsed
+                print(
+                    f"{processed} records processed, {inserted} imported, "
+                    f"{conflicts.count} skipped ({rate:,.0f} records/s)"
+                )
+
+            if upcoming is None:
+                break
+            pending = upcoming
+    finally:
+        pool.shutdown(cancel_futures=True)
+        conflicts.close()
+        await conn.close()
+
+    print()
+    print(f"Done: {inserted} users imported, {conflicts.count} skipped")
+    if conflicts.count:
+        print(f"Skipped records: {conflicts.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument("file", help="CSV or JSONL file with one user per record")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Hashing processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--role",
+        default=UserRole.USER.value,
+        choices=[role.value for role in UserRole],
+        help="Role for records without one",
+    )
+    parser.add_argument(
+        "--checkpoint", help="Checkpoint file (default: FILE.checkpoint)"
+    )
+    parser.add_argument(
+        "--conflicts", help="Skipped records report (default: FILE.conflicts.csv)"
+    )
+    args = parser.parse_args()
+
+    if not Path(args.file).exists():
+        print(f"Error: {args.file} not found")
+        sys.exit(1)
+
+    asyncio.run(import_users(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import math
+
+
+class BloomFilter:
+    """
+    In-process Bloom filter over strings.
+
+    Sized for `capacity` items at the given false positive rate. Bit
+    positions come from Python's built-in string hash (double hashing), so
+    a lookup does no allocation beyond small ints and bails out at the
+    first unset bit; the hash is randomized per process, so a filter is
+    never shared between processes. Items cannot be removed: rebuild the
+    filter to drop them.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(1, capacity)
+        bits = -capacity * math.log(error_rate) / math.log(2) ** 2
+        # A power of two lets positions be masked instead of divided
+        self.size = 1 << max(3, math.ceil(math.log2(bits)))
+        self.hashes = max(1, round(bits / capacity * math.log(2)))
+        self.count = 0
+        self._mask = self.size - 1
+        self._bits = bytearray(self.size // 8)
+
+    def add(self, item: str):
+        h = hash(item)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) & 0xFFFFFFFF | 1
+        bits, mask = self._bits, self._mask
+        for _ in range(self.hashes):
+            position = h1 & mask
+            bits[position >> 3] |= 1 << (position & 7)
+            h1 += h2
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        h = hash(item)
+        bits, mask = self._bits, self._mask
+        # Most lookups are misses: test the first position before setting
+        # up the remaining probes
+        position = h & mask
+        if not bits[position >> 3] & (1 << (position & 7)):
+            return False
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) & 0xFFFFFFFF | 1
+        for _ in range(self.hashes - 1):
+            h1 += h2
+            position = h1 & mask
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.core.metrics import metrics
+
+
+class LRUCache:
+    """
+    Size-bounded in-process LRU cache with per-entry expiry.
+
+    Entries carry an absolute expiry timestamp (epoch seconds) and are
+    dropped lazily on lookup. Hits and misses are reported as
+    `cache_hits_total` / `cache_misses_total` labelled with the cache name.
+    """
+
+    def __init__(self, name: str, maxsize: int):
+        self.name = name
+        self.maxsize = maxsize
+        self._data: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
+        self._hits = metrics.counter(
+            "cache_hits_total", "In-process cache hits", labels={"cache": name}
+        )
+        self._misses = metrics.counter(
+            "cache_misses_total", "In-process cache misses", labels={"cache": name}
+        )
+
+    def get(self, key: Any) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self._misses.inc()
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.time():
+            del self._data[key]
+            self._misses.inc()
+            return None
+
+        self._data.move_to_end(key)
+        self._hits.inc()
+        return value
+
+    def set(self, key: Any, value: Any, expires_at: float):
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Any):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    @property
+    def hits(self) -> int:
+        return int(self._hits.value)
+
+    @property
+    def misses(self) -> int:
+        return int(self._misses.value)
+
+    def __len__(self) -> int:
+        return len(self._data)
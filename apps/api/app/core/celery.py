@@ -19,4 +19,14 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     result_expires=3600,  # 1 hour
+    beat_schedule={
+        "purge-expired-sessions": {
+            "task": "purge_expired_sessions",
+            "schedule": 3600.0,  # hourly
+        },
+        "rotate-signing-keys": {
+            "task": "rotate_signing_keys",
+            "schedule": 3600.0,  # hourly check; rotates every jwt_key_rotation_days
+        },
+    },
 )
@@ -0,0 +1,105 @@
+import time
+from uuid import uuid4
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Connection pool that records how long checkouts wait.
+
+    The time to obtain a connection (waiting for a free one, or opening an
+    overflow connection) goes to `db_pool_wait_seconds`, and checkouts
+    that give up after `pool_timeout` are counted in
+    `db_pool_timeouts_total`. Both are also kept on the pool for
+    `pool_stats()`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self._wait_histogram = metrics.histogram(
+            "db_pool_wait_seconds",
+            "Time to check a connection out of the pool",
+            buckets=_WAIT_BUCKETS,
+        )
+        self._timeout_counter = metrics.counter(
+            "db_pool_timeouts_total", "Pool checkouts that timed out"
+        )
+        self._checked_out = metrics.gauge(
+            "db_pool_checked_out", "Connections currently checked out"
+        )
+        self._overflow_gauge = metrics.gauge(
+            "db_pool_overflow", "Connections open beyond pool_size"
+        )
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            self._timeout_counter.inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.waits += 1
+            self.wait_seconds += elapsed
+            self._wait_histogram.observe(elapsed)
+            self._update_gauges()
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        self._checked_out.set(self.checkedout())
+        self._overflow_gauge.set(max(0, self.overflow()))
+
+
+def engine_options() -> dict:
+    """Pool and driver options for the application's async engine."""
+    statement_cache_size = settings.db_statement_cache_size
+    connect_args: dict = {}
+    if settings.db_pgbouncer:
+        # PgBouncer in transaction mode hands each transaction to any
+        # server connection, so prepared statements must not be cached
+        # and their names must not collide across clients
+        statement_cache_size = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid4()}__"
+    connect_args["statement_cache_size"] = statement_cache_size
+    connect_args["prepared_statement_cache_size"] = statement_cache_size
+
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
+def pool_stats(pool: InstrumentedQueuePool) -> dict:
+    """Live occupancy and wait figures of a pool."""
+    average_wait = pool.wait_seconds / pool.waits if pool.waits else 0.0
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.db_max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(0, pool.overflow()),
+        "checkouts": pool.waits,
+        "wait_seconds_total": round(pool.wait_seconds, 6),
+        "wait_seconds_avg": round(average_wait, 6),
+        "timeouts": pool.timeouts,
+    }
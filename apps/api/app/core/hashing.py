@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.metrics import metrics
+from app.core.password_policy import HashPolicy, calibrate
+from app.core.security import verify_password
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification off the event loop.
+
+    Work is dispatched to a bounded thread or process pool (bcrypt and
+    argon2 release the GIL, so threads scale with cores too). Once every
+    worker is busy and the wait queue is full, new requests fail fast with
+    a 503 instead of piling up behind the CPU-bound work.
+
+    New hashes use `policy`, whose work factor `initialize()` calibrates
+    to `password_hash_target_ms` on this machine.
+    """
+
+    def __init__(self):
+        self._policy: HashPolicy | None = None
+        self._executor: Executor | None = None
+        self._workers = 0
+        self._pending = 0
+        self._in_flight = metrics.gauge(
+            "password_hash_in_flight", "Password hash operations running or queued"
+        )
+        self._queue_depth = metrics.gauge(
+            "password_hash_queue_depth", "Password hash operations waiting for a worker"
+        )
+        self._rejected = metrics.counter(
+            "password_hash_rejected_total",
+            "Password hash operations rejected (queue full)",
+        )
+        self._duration = metrics.histogram(
+            "password_hash_seconds", "Password hash latency including queue wait"
+        )
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            self._workers = settings.password_hash_workers or os.cpu_count() or 1
+            if settings.password_hash_executor == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self._workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix="password-hash"
+                )
+            logger.info(
+                f"Password hasher started with {self._workers} "
+                f"{settings.password_hash_executor} workers"
+            )
+        return self._executor
+
+    @property
+    def policy(self) -> HashPolicy:
+        # Uncalibrated until initialize() runs (CLI commands, workers)
+        if self._policy is None:
+            self._policy = HashPolicy.from_settings()
+        return self._policy
+
+    async def initialize(self):
+        """Load the hashing policy and calibrate its cost on this machine."""
+        policy = HashPolicy.from_settings()
+        if settings.password_hash_target_ms > 0:
+            loop = asyncio.get_running_loop()
+            policy = await loop.run_in_executor(
+                self._get_executor(),
+                calibrate,
+                policy,
+                settings.password_hash_target_ms,
+            )
+        self._policy = policy
+        logger.info(f"Hashing new passwords with {policy.describe()}")
+
+    def _update_gauges(self):
+        self._in_flight.set(self._pending)
+        self._queue_depth.set(max(0, self._pending - self._workers))
+
+    async def _run(self, func, *args):
+        executor = self._get_executor()
+        if self._pending >= self._workers + settings.password_hash_queue_size:
+            self._rejected.inc()
+            raise ServiceUnavailableException(
+                detail="Authentication service is busy, please retry"
+            )
+
+        self._pending += 1
+        self._update_gauges()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            self._pending -= 1
+            self._update_gauges()
+            self._duration.observe(loop.time() - start)
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop."""
+        return await self._run(self.policy.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash is weaker than the current policy."""
+        return self.policy.needs_rehash(hashed_password)
+
+    def shutdown(self):
+        """Stop the worker pool (called on application shutdown)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hasher = PasswordHasher()
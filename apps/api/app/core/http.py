@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import math
+import time
+
+import httpx
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Only these are retried after a response or read failure; any request is
+# retried when the connection could not be established (nothing was sent)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    After `threshold` failures in a row the circuit opens and calls fail
+    fast for `reset_seconds`. Calls are then let through again: a success
+    closes the circuit, a failure opens it for another period.
+    """
+
+    def __init__(self, threshold: int, reset_seconds: float):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    def retry_after(self) -> float:
+        """Seconds until calls are allowed again; 0 when the circuit is closed."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+class HttpClient:
+    """
+    Pooled outbound HTTP client (one per upstream service).
+
+    One pooled `httpx.AsyncClient` keeps connections (and TLS sessions)
+    alive across requests, optionally over HTTP/2. Every call has strict
+    timeouts, transient failures are retried with exponential backoff and
+    each upstream host has a circuit breaker, so an unavailable provider
+    fails fast with a 503 instead of tying up requests.
+    """
+
+    def __init__(self, name: str = "default", max_connections: int | None = None):
+        self.name = name
+        self.max_connections = max_connections or settings.http_client_max_connections
+        self._client: httpx.AsyncClient | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            http2 = settings.http_client_http2
+            if http2:
+                try:
+                    import h2  # noqa: F401
+                except ImportError:
+                    logger.warning("HTTP/2 requested but h2 is not installed")
+                    http2 = False
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            )
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(
+                    settings.http_client_timeout_seconds,
+                    connect=settings.http_client_connect_timeout_seconds,
+                ),
+                # Retries are handled by request(), not the transport
+                transport=httpx.AsyncHTTPTransport(http2=http2, limits=limits),
+            )
+        return self._client
+
+    async def initialize(self):
+        """Open the connection pool."""
+        self._get_client()
+
+    def _breaker(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                settings.http_client_breaker_threshold,
+                settings.http_client_breaker_reset_seconds,
+            )
+        return breaker
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request through the pool.
+
+        Returns the response without raising for its status; transport
+        errors are raised after the retries are exhausted.
+        """
+        host = httpx.URL(url).host
+        breaker = self._breaker(host)
+        wait = breaker.retry_after()
+        if wait:
+            metrics.counter(
+                "http_client_short_circuited_total",
+                "Outbound requests rejected by an open circuit breaker",
+                labels={"client": self.name, "host": host},
+            ).inc()
+            raise ServiceUnavailableException(
+                detail=f"Upstream service {host} is unavailable",
+                retry_after=math.ceil(wait),
+            )
+
+        client = self._get_client()
+        idempotent = method in IDEMPOTENT_METHODS
+        retries = settings.http_client_retries
+        duration = metrics.histogram(
+            "http_client_request_seconds",
+            "Outbound HTTP request latency",
+            labels={"client": self.name, "host": host},
+        )
+        for attempt in range(retries + 1):
+            if attempt:
+                await asyncio.sleep(
+                    settings.http_client_backoff_seconds * 2 ** (attempt - 1)
+                )
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                duration.observe(time.perf_counter() - start)
+                logger.warning(f"{method} {url} failed: {e!r}")
+                unsent = isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                if attempt == retries or not (idempotent or unsent):
+                    breaker.record_failure()
+                    raise
+                continue
+            duration.observe(time.perf_counter() - start)
+            if not idempotent or response.status_code not in RETRY_STATUSES:
+                break
+            if attempt < retries:
+                await response.aclose()
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def cleanup(self):
+        """Close pooled connections (called on application shutdown)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,159 @@
+import base64
+import json
+from typing import Any, Protocol
+
+
+class TokenError(Exception):
+    """A token could not be decoded or failed verification."""
+
+
+def unverified_header(token: str) -> dict:
+    """Decode a JWT's header without verifying anything."""
+    try:
+        segment = token.split(".", 1)[0]
+        header = json.loads(
+            base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+        )
+    except (ValueError, UnicodeDecodeError) as e:
+        raise TokenError(f"Invalid token header: {e}") from e
+    if not isinstance(header, dict):
+        raise TokenError("Invalid token header")
+    return header
+
+
+class TokenCodec(Protocol):
+    """
+    JWT signing and verification backend.
+
+    Keys are first turned into the backend's own key objects with
+    `prepare_key` (a secret string, or a `cryptography` private or public
+    key) so that parsing is not repeated on every call. `decode` checks
+    the signature and `exp`, and raises TokenError on any failure.
+    """
+
+    name: str
+
+    def prepare_key(self, key: Any, algorithm: str) -> Any: ...
+
+    def encode(
+        self, claims: dict, key: Any, algorithm: str, headers: dict | None = None
+    ) -> str: ...
+
+    def decode(self, token: str, key: Any, algorithms: list[str]) -> dict: ...
+
+
+class JoseCodec:
+    name = "jose"
+
+    def __init__(self):
+        from jose import JWTError, jwk, jwt
+
+        self._jwk = jwk
+        self._jwt = jwt
+        self._error = JWTError
+
+    def prepare_key(self, key: Any, algorithm: str) -> Any:
+        return self._jwk.construct(key, algorithm)
+
+    def encode(
+        self, claims: dict, key: Any, algorithm: str, headers: dict | None = None
+    ) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: list[str]) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=algorithms)
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+class AuthlibCodec:
+    name = "authlib"
+
+    def __init__(self):
+        from authlib.jose import ECKey, JoseError, JsonWebToken, OctKey
+
+        self._key_types = {"HS": OctKey, "ES": ECKey}
+        self._jwt = JsonWebToken
+        self._error = JoseError
+        self._instances: dict[tuple[str, ...], Any] = {}
+
+    def _instance(self, algorithms: list[str]):
+        key = tuple(algorithms)
+        if key not in self._instances:
+            self._instances[key] = self._jwt(list(algorithms))
+        return self._instances[key]
+
+    def prepare_key(self, key: Any, algorithm: str) -> Any:
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        return self._key_types[algorithm[:2]].import_key(key)
+
+    def encode(
+        self, claims: dict, key: Any, algorithm: str, headers: dict | None = None
+    ) -> str:
+        header = {"alg": algorithm, "typ": "JWT", **(headers or {})}
+        return self._instance([algorithm]).encode(header, claims, key).decode("ascii")
+
+    def decode(self, token: str, key: Any, algorithms: list[str]) -> dict:
+        try:
+            claims = self._instance(algorithms).decode(token, key)
+            claims.validate()
+        except self._error as e:
+            raise TokenError(str(e)) from e
+        return dict(claims)
+
+
+class PyJWTCodec:
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+
+        self._jwt = jwt
+        self._error = jwt.PyJWTError
+
+    def prepare_key(self, key: Any, algorithm: str) -> Any:
+        # PyJWT takes secrets and `cryptography` keys as they are
+        return key.encode("utf-8") if isinstance(key, str) else key
+
+    def encode(
+        self, claims: dict, key: Any, algorithm: str, headers: dict | None = None
+    ) -> str:
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token: str, key: Any, algorithms: list[str]) -> dict:
+        try:
+            return self._jwt.decode(token, key, algorithms=algorithms)
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+BACKENDS: dict[str, type] = {
+    "jose": JoseCodec,
+    "authlib": AuthlibCodec,
+    "pyjwt": PyJWTCodec,
+}
+
+
+def available_codecs() -> list[TokenCodec]:
+    """Instantiate every backend whose library is installed."""
+    codecs = []
+    for factory in BACKENDS.values():
+        try:
+            codecs.append(factory())
+        except ImportError:
+            continue
+    return codecs
+
+
+def get_codec(name: str) -> TokenCodec:
+    """Instantiate a backend by name (`jose`, `authlib` or `pyjwt`)."""
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown JWT backend {name!r}, expected one of {list(BACKENDS)}"
+        )
+    try:
+        return BACKENDS[name]()
+    except ImportError as e:
+        raise RuntimeError(f"JWT backend {name!r} is not installed: {e}") from e
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.jwt_codec import TokenCodec, get_codec
+from app.core.settings import settings
+from app.models.database import engine
+from app.models.signing_key import SigningKey
+
+logger = logging.getLogger(__name__)
+
+# Advisory lock held while creating signing keys, so replicas starting at
+# the same time (or overlapping rotations) do not each create one
+SIGNING_KEYS_LOCK = 0x6A776B73
+
+# Curve per supported JWS algorithm
+CURVES = {
+    "ES256": ec.SECP256R1,
+    "ES384": ec.SECP384R1,
+    "ES512": ec.SECP521R1,
+}
+
+
+def generate_signing_key(activates_at: datetime) -> SigningKey:
+    """Create a new key pair for `settings.algorithm`."""
+    private_key = ec.generate_private_key(CURVES[settings.algorithm]())
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.BestAvailableEncryption(settings.secret_key.encode("utf-8")),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    key = SigningKey(
+        algorithm=settings.algorithm,
+        private_key=pem.decode("ascii"),
+        public_jwk={},
+        created_at=datetime.now(timezone.utc),
+        activates_at=activates_at,
+    )
+    key.public_jwk = {
+        **jwk.construct(public_pem, settings.algorithm).to_dict(),
+        "kid": key.kid,
+        "use": "sig",
+    }
+    return key
+
+
+def plan_rotation(keys: list[SigningKey], now: datetime) -> tuple[bool, list[str]]:
+    """
+    Decide what a rotation run should do.
+
+    Returns whether a new key is due (so that it activates one rotation
+    period after the current one, after being published for
+    `jwt_key_publish_hours`), and the kids of keys that no longer sign and
+    whose tokens have all expired.
+    """
+    ordered = sorted(keys, key=lambda key: key.activates_at)
+    publish_lead = timedelta(hours=settings.jwt_key_publish_hours)
+    rotation = timedelta(days=settings.jwt_key_rotation_days)
+    due = not ordered or now >= ordered[-1].activates_at + rotation - publish_lead
+
+    # Refresh tokens are the longest-lived tokens signed with these keys
+    token_lifetime = timedelta(days=settings.refresh_token_expire_days)
+    expired = [
+        key.kid
+        for key, successor in zip(ordered, ordered[1:])
+        if successor.activates_at + token_lifetime < now
+    ]
+    return due, expired
+
+
+class KeyRing:
+    """
+    In-memory view of the JWT signing keys stored in the database.
+
+    Keys are reloaded periodically, so a key generated by the rotation
+    task reaches every replica while it is only being published; signing
+    switches to it once its `activates_at` passes. Token verification picks
+    the key by the `kid` header. Keys are held in the form `codec` takes.
+    """
+
+    def __init__(self, codec: TokenCodec):
+        self.codec = codec
+        # kid -> (activates_at, private key, public key); some backends only
+        # verify EC signatures with the public half
+        self._keys: dict[str, tuple[datetime, Any, Any]] = {}
+        self._jwks: list[dict] = []
+        self._reloader: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.algorithm in CURVES
+
+    async def initialize(self):
+        """Load the keys (creating the first one if needed) and start reloading."""
+        if not self.enabled:
+            return
+        await self.reload(create_if_missing=True)
+        self._reloader = asyncio.create_task(self._reload_periodically())
+
+    async def reload(self, create_if_missing: bool = False):
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            rows = list((await db.exec(select(SigningKey))).all())
+            if not rows and create_if_missing:
+                await db.exec(select(func.pg_advisory_xact_lock(SIGNING_KEYS_LOCK)))
+                # Another replica may have created it while we waited
+                rows = list((await db.exec(select(SigningKey))).all())
+                if not rows:
+                    key = generate_signing_key(activates_at=datetime.now(timezone.utc))
+                    db.add(key)
+                    logger.info(f"Generated initial signing key {key.kid}")
+                    rows = [key]
+                await db.commit()
+
+        keys = {}
+        for row in rows:
+            if row.kid in self._keys:
+                keys[row.kid] = self._keys[row.kid]
+                continue
+            private_key = serialization.load_pem_private_key(
+                row.private_key.encode("ascii"), settings.secret_key.encode("utf-8")
+            )
+            keys[row.kid] = (
+                row.activates_at,
+                self.codec.prepare_key(private_key, row.algorithm),
+                self.codec.prepare_key(private_key.public_key(), row.algorithm),
+            )
+        self._keys = keys
+        self._jwks = [row.public_jwk for row in rows]
+
+    async def _reload_periodically(self):
+        while True:
+            await asyncio.sleep(settings.jwt_keys_reload_seconds)
+            try:
+                await self.reload()
+            except (SQLAlchemyError, OSError, ValueError) as e:
+                # Database unavailable, or a key that cannot be decrypted
+                logger.error(f"Reloading signing keys failed: {e}")
+
+    def signing_key(self) -> tuple[str, Any]:
+        """Return (kid, key) of the newest active key."""
+        now = datetime.now(timezone.utc)
+        active = [
+            (activates_at, kid, key)
+            for kid, (activates_at, key, _) in self._keys.items()
+            if activates_at <= now
+        ]
+        if not active:
+            raise RuntimeError("No active JWT signing key loaded")
+        _, kid, key = max(active, key=lambda item: item[0])
+        return kid, key
+
+    def verification_key(self, kid: str) -> Any | None:
+        entry = self._keys.get(kid)
+        return entry[2] if entry else None
+
+    def jwks(self) -> dict:
+        """Public keys in JWK Set format, including not yet active ones."""
+        return {"keys": self._jwks}
+
+    async def cleanup(self):
+        if self._reloader:
+            self._reloader.cancel()
+            await asyncio.gather(self._reloader, return_exceptions=True)
+            self._reloader = None
+
+
+keyring = KeyRing(get_codec(settings.jwt_backend))
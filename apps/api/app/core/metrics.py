@@ -0,0 +1,150 @@
+import math
+from bisect import bisect_left
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{value}"' for key, value in labels)
+    return "{" + inner + "}"
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def samples(self, name: str, labels: tuple) -> list[str]:
+        return [f"{name}{_format_labels(labels)} {self.value}"]
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def samples(self, name: str, labels: tuple) -> list[str]:
+        return [f"{name}{_format_labels(labels)} {self.value}"]
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds (in seconds by default)."""
+
+    kind = "histogram"
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def samples(self, name: str, labels: tuple) -> list[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else repr(bound)
+            bucket_labels = _format_labels((*labels, ("le", le)))
+            lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{_format_labels(labels)} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process metrics registry.
+
+    Metrics are created on first use and identified by name plus labels,
+    so modules can simply call `metrics.counter("name").inc()` on hot paths.
+    Rendered in the Prometheus text format by the /metrics endpoint.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, dict[tuple, Counter | Gauge | Histogram]] = {}
+        self._help: dict[str, str] = {}
+
+    def _get(self, factory, name: str, description: str, labels: dict | None):
+        key = tuple(sorted((labels or {}).items()))
+        family = self._metrics.setdefault(name, {})
+        metric = family.get(key)
+        if metric is None:
+            metric = family[key] = factory()
+            if description:
+                self._help[name] = description
+        return metric
+
+    def counter(
+        self, name: str, description: str = "", labels: dict | None = None
+    ) -> Counter:
+        return self._get(Counter, name, description, labels)
+
+    def gauge(
+        self, name: str, description: str = "", labels: dict | None = None
+    ) -> Gauge:
+        return self._get(Gauge, name, description, labels)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        labels: dict | None = None,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get(lambda: Histogram(buckets), name, description, labels)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, family in sorted(self._metrics.items()):
+            if not family:
+                continue
+            kind = next(iter(family.values())).kind
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in family.items():
+                lines.extend(metric.samples(name, labels))
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,134 @@
+import math
+import time
+from dataclasses import dataclass, replace
+
+import bcrypt
+
+from app.core.settings import settings
+
+ALGORITHMS = ("bcrypt", "argon2id")
+
+# bcrypt's cost field is two digits, so no more than 31 rounds
+_BCRYPT_MAX_ROUNDS = 31
+
+
+def _argon2():
+    try:
+        import argon2
+    except ImportError as e:
+        raise RuntimeError("argon2id password hashing needs argon2-cffi") from e
+    return argon2
+
+
+def _bcrypt_rounds(hashed: str) -> int:
+    # $2b$12$<salt+hash>
+    return int(hashed.split("$")[2])
+
+
+@dataclass(frozen=True, slots=True)
+class HashPolicy:
+    """
+    Algorithm and work factors used for new password hashes.
+
+    Policies are plain values, so they can be sent to hashing worker
+    processes. `needs_rehash` only reports hashes that are weaker than the
+    policy (or use another algorithm): replicas calibrated to slightly
+    different costs then never keep rehashing each other's passwords.
+    """
+
+    algorithm: str = "bcrypt"
+    bcrypt_rounds: int = 12
+    argon2_time_cost: int = 2
+    argon2_memory_kib: int = 19456
+    argon2_parallelism: int = 1
+
+    @classmethod
+    def from_settings(cls) -> "HashPolicy":
+        if settings.password_hash_algorithm not in ALGORITHMS:
+            raise ValueError(
+                f"Unknown password hash algorithm "
+                f"{settings.password_hash_algorithm!r}, expected one of {ALGORITHMS}"
+            )
+        if settings.password_hash_algorithm == "argon2id":
+            _argon2()
+        return cls(
+            algorithm=settings.password_hash_algorithm,
+            bcrypt_rounds=settings.password_bcrypt_rounds,
+            argon2_time_cost=settings.password_argon2_time_cost,
+            argon2_memory_kib=settings.password_argon2_memory_kib,
+            argon2_parallelism=settings.password_argon2_parallelism,
+        )
+
+    def hash(self, password: str) -> str:
+        if self.algorithm == "argon2id":
+            argon2 = _argon2()
+            return argon2.PasswordHasher(
+                time_cost=self.argon2_time_cost,
+                memory_cost=self.argon2_memory_kib,
+                parallelism=self.argon2_parallelism,
+                type=argon2.Type.ID,
+            ).hash(password)
+        salt = bcrypt.gensalt(rounds=self.bcrypt_rounds)
+        return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Whether a stored hash is weaker than this policy."""
+        if self.algorithm == "argon2id":
+            if not hashed.startswith("$argon2id$"):
+                return True
+            params = _argon2().extract_parameters(hashed)
+            return (
+                params.time_cost < self.argon2_time_cost
+                or params.memory_cost < self.argon2_memory_kib
+                or params.parallelism < self.argon2_parallelism
+            )
+        if not hashed.startswith("$2"):
+            return True
+        return _bcrypt_rounds(hashed) < self.bcrypt_rounds
+
+    def describe(self) -> str:
+        if self.algorithm == "argon2id":
+            return (
+                f"argon2id (t={self.argon2_time_cost}, "
+                f"m={self.argon2_memory_kib} KiB, p={self.argon2_parallelism})"
+            )
+        return f"bcrypt ({self.bcrypt_rounds} rounds)"
+
+
+def verify(password: str, hashed: str) -> bool:
+    """Check a password against a bcrypt or argon2id hash."""
+    if hashed.startswith("$argon2"):
+        argon2 = _argon2()
+        try:
+            return argon2.PasswordHasher().verify(hashed, password)
+        except argon2.exceptions.VerificationError:
+            return False
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+def _time_hash(policy: HashPolicy, samples: int = 3) -> float:
+    """Fastest of a few hashes, in milliseconds."""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        policy.hash("calibration password")
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def calibrate(policy: HashPolicy, target_ms: float) -> HashPolicy:
+    """
+    Raise the policy's work factor until one hash takes about `target_ms`.
+
+    The policy's own costs are the floor: a slow machine never weakens
+    hashes below them. Each bcrypt round doubles the work; argon2id time
+    scales linearly with the number of passes at a fixed memory cost.
+    """
+    elapsed = _time_hash(policy)
+    if elapsed >= target_ms:
+        return policy
+    if policy.algorithm == "argon2id":
+        passes = int(policy.argon2_time_cost * target_ms / elapsed)
+        return replace(policy, argon2_time_cost=max(policy.argon2_time_cost, passes))
+    rounds = policy.bcrypt_rounds + int(math.log2(target_ms / elapsed))
+    return replace(policy, bcrypt_rounds=min(rounds, _BCRYPT_MAX_ROUNDS))
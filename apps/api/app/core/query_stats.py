@@ -0,0 +1,143 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_OPERATIONS = frozenset(
+    ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK")
+)
+_QUERIES_PER_REQUEST_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Queries issued while handling one request."""
+
+    count: int = 0
+    seconds: float = 0.0
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def _operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in _OPERATIONS else "OTHER"
+
+
+def _truncate(value: object, limit: int = 500) -> str:
+    text = str(value)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+def instrument_engine(engine: Engine):
+    """
+    Time every statement run on an engine (pass `async_engine.sync_engine`).
+
+    Latencies go to the `db_query_seconds` histogram by SQL operation and
+    are added to the current request's QueryStats. Statements slower than
+    `db_slow_query_ms` are logged; only a sample of those logs include the
+    parameters, which may hold personal data.
+    """
+    histograms = {
+        operation: metrics.histogram(
+            "db_query_seconds",
+            "SQL statement latency",
+            labels={"operation": operation},
+        )
+        for operation in (*_OPERATIONS, "OTHER")
+    }
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        histograms[_operation(statement)].observe(elapsed)
+
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+        if elapsed * 1000 >= settings.db_slow_query_ms:
+            # One line per statement
+            sql = _truncate(" ".join(statement.split()))
+            message = f"Slow query ({elapsed * 1000:.1f} ms): {sql}"
+            if random.random() < settings.db_slow_query_params_sample_rate:
+                message += f" parameters={_truncate(parameters)}"
+            logger.warning(message)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # Failed connects and pre-pings have no Connection yet
+        if exception_context.connection is None:
+            return
+        # after_cursor_execute does not run for failed statements
+        started = exception_context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class QueryStatsMiddleware:
+    """
+    Count the queries and database time of each HTTP request.
+
+    Adds `X-DB-Query-Count` and a `Server-Timing` `db` entry to responses
+    (unless `db_stats_headers` is off), records the count per route in the
+    `db_queries_per_request` histogram and logs requests above
+    `db_request_query_warn` queries, which usually means an N+1 pattern.
+    Queries run while a streaming body is sent count toward the metrics but
+    not the headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start" and settings.db_stats_headers:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-query-count", str(stats.count).encode()))
+                headers.append(
+                    (b"server-timing", f"db;dur={stats.seconds * 1000:.2f}".encode())
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.histogram(
+                "db_queries_per_request",
+                "SQL statements issued per HTTP request",
+                labels={"route": path},
+                buckets=_QUERIES_PER_REQUEST_BUCKETS,
+            ).observe(stats.count)
+            if stats.count > settings.db_request_query_warn:
+                logger.warning(
+                    f"{scope['method']} {path} issued {stats.count} queries "
+                    f"({stats.seconds * 1000:.1f} ms)"
+                )
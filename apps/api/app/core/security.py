@@ -1,30 +1,62 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
 from typing import Optional
-import bcrypt
-from jose import JWTError, jwt
+
+from ulid import ULID
+
+from app.core import password_policy
+from app.core.cache import LRUCache
+from app.core.jwt_codec import TokenError, unverified_header
+from app.core.keyring import keyring
+from app.core.password_policy import HashPolicy
 from app.core.settings import settings
 
+# Verified access token payloads, keyed by a digest of the raw token
+_access_token_cache = LRUCache("access_token", settings.token_cache_size)
+
+# Signing backend shared with the keyring, and the secret in its key format
+codec = keyring.codec
+_secret_key = codec.prepare_key(settings.secret_key, "HS256")
+
+
+def _encode(claims: dict) -> str:
+    if keyring.enabled:
+        kid, key = keyring.signing_key()
+        return codec.encode(claims, key, settings.algorithm, headers={"kid": kid})
+    return codec.encode(claims, _secret_key, settings.algorithm)
+
+
+def _decode(token: str) -> dict:
+    """Verify a token with the key named by its `kid` header."""
+    if not keyring.enabled:
+        return codec.decode(token, _secret_key, [settings.algorithm])
+
+    kid = unverified_header(token).get("kid")
+    if kid is None and settings.jwt_accept_hs256:
+        # Issued before the switch to asymmetric keys
+        return codec.decode(token, _secret_key, ["HS256"])
+    key = keyring.verification_key(kid)
+    if key is None:
+        raise TokenError("Unknown signing key")
+    return codec.decode(token, key, [settings.algorithm])
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a plain password against a hashed password.
+    """Verify a plain password against a bcrypt or argon2id hash.
 
     Note: Bcrypt has a 72-byte limit. Passwords longer than 72 bytes
     will be automatically truncated by bcrypt.
     """
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-    )
+    return password_policy.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt.
+def get_password_hash(password: str, policy: Optional[HashPolicy] = None) -> str:
+    """Hash a password with `policy` (by default the configured, uncalibrated one).
 
     Note: Bcrypt has a 72-byte limit. Passwords longer than 72 bytes
     will be automatically truncated by bcrypt.
     """
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed.decode("utf-8")
+    return (policy or HashPolicy.from_settings()).hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -34,8 +66,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     - sub: username
     - role: user role (for fast authorization checks)
     - exp: expiration timestamp
+    - jti: unique token ID (a ULID, so it also records the issue time)
     """
-    to_encode = data.copy()
+    to_encode = {"jti": str(ULID()), **data}
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -43,20 +76,38 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.access_token_expire_minutes
         )
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.secret_key, algorithm=settings.algorithm
-    )
-    return encoded_jwt
+    return _encode(to_encode)
 
 
 def decode_access_token(token: str) -> Optional[dict]:
-    try:
-        payload = jwt.decode(
-            token, settings.secret_key, algorithms=[settings.algorithm]
-        )
+    """Decode and verify an access token.
+
+    Refresh tokens and tokens without the `jti` and `uid` claims that
+    revocation checks rely on are rejected. Successfully verified payloads
+    are cached until the token's `exp`, so repeated requests with the same
+    bearer token skip signature checks.
+    """
+    cache_key = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _access_token_cache.get(cache_key)
+    if payload is not None:
         return payload
-    except JWTError:
+
+    try:
+        payload = _decode(token)
+    except TokenError:
         return None
+    if payload.get("type") == "refresh" or "jti" not in payload or "uid" not in payload:
+        return None
+
+    expires_at = payload.get("exp")
+    if isinstance(expires_at, (int, float)):
+        _access_token_cache.set(cache_key, payload, expires_at)
+    return payload
+
+
+def hash_token(token: str) -> str:
+    """Return the SHA-256 hex digest stored in place of a refresh token."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
 
 
 def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -68,19 +119,14 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
             days=settings.refresh_token_expire_days
         )
     to_encode.update({"exp": expire, "type": "refresh"})
-    encoded_jwt = jwt.encode(
-        to_encode, settings.secret_key, algorithm=settings.algorithm
-    )
-    return encoded_jwt
+    return _encode(to_encode)
 
 
 def decode_refresh_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(
-            token, settings.secret_key, algorithms=[settings.algorithm]
-        )
+        payload = _decode(token)
         if payload.get("type") != "refresh":
             return None
         return payload
-    except JWTError:
+    except TokenError:
         return None
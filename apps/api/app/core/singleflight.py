@@ -0,0 +1,55 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.core.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight await the same result instead of issuing their own query.
+    Results are shared between callers and must be treated as read-only.
+    The number of avoided calls is reported as `singleflight_saved_total`.
+    """
+
+    def __init__(self, name: str):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self._saved = metrics.counter(
+            "singleflight_saved_total",
+            "Calls served by an identical in-flight call",
+            labels={"group": name},
+        )
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self._saved.inc()
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                # The leader was cancelled, not us: run the call ourselves
+                if future.cancelled() and not (task and task.cancelling()):
+                    return await self.do(key, func)
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Followers re-raise it; don't log it as never retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
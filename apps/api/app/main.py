@@ -1,13 +1,28 @@
+import hmac
 from contextlib import asynccontextmanager
+from typing import Annotated
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from sqlmodel import SQLModel
 from app.api.auth.api import router as auth_router
 from app.api.websocket import router as ws_router
+from app.core.hashing import hasher
+from app.core.db_pool import pool_stats
+from app.core.exceptions import AuthenticationException
+from app.core.keyring import keyring
+from app.core.metrics import metrics
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.settings import settings
 from app.core.websocket import manager
 from app.models.database import engine
+from app.modules.auth.providers import cleanup_providers, initialize_providers
+from app.modules.auth.revocation import revocations
+from app.modules.auth.throttle import login_throttle
+from app.modules.auth.user_cache import user_cache
 
 
 @asynccontextmanager
@@ -17,9 +32,21 @@ async def lifespan(app: FastAPI):
         await conn.run_sync(SQLModel.metadata.create_all)
     # Initialize WebSocket manager
     await manager.initialize()
+    await keyring.initialize()
+    await hasher.initialize()
+    await user_cache.initialize()
+    await login_throttle.initialize()
+    await revocations.initialize()
+    await initialize_providers()
     yield
     # Cleanup on shutdown
     await manager.cleanup()
+    await user_cache.cleanup()
+    await login_throttle.cleanup()
+    await revocations.cleanup()
+    await keyring.cleanup()
+    await cleanup_providers()
+    hasher.shutdown()
     await engine.dispose()
 
 
@@ -39,6 +66,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(QueryStatsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(ws_router)
@@ -47,3 +76,45 @@ app.include_router(ws_router)
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+monitoring_bearer = HTTPBearer(auto_error=False)
+
+
+async def require_monitoring_token(
+    credentials: Annotated[
+        HTTPAuthorizationCredentials | None, Depends(monitoring_bearer)
+    ],
+):
+    """Guard internal endpoints with `settings.monitoring_token`."""
+    if not settings.monitoring_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    if credentials is None or not hmac.compare_digest(
+        credentials.credentials.encode("utf-8"),
+        settings.monitoring_token.encode("utf-8"),
+    ):
+        raise AuthenticationException()
+
+
+@app.get("/health/db-pool", dependencies=[Depends(require_monitoring_token)])
+async def read_db_pool():
+    """Live connection pool occupancy and checkout waits of this process."""
+    return pool_stats(engine.pool)
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_monitoring_token)],
+)
+async def read_metrics():
+    return metrics.render()
+
+
+@app.get("/.well-known/jwks.json")
+async def read_jwks(response: Response):
+    """Public keys for verifying access tokens locally."""
+    response.headers["Cache-Control"] = (
+        f"public, max-age={settings.jwt_jwks_max_age_seconds}"
+    )
+    return keyring.jwks()
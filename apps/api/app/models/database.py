@@ -1,5 +1,7 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.db_pool import engine_options
+from app.core.query_stats import instrument_engine
 from app.core.settings import settings
 
 
@@ -9,9 +11,10 @@ from app.core.settings import settings
 
 engine = create_async_engine(
     settings.database_url,
-    echo=True,
-    pool_pre_ping=True,
+    echo=settings.db_echo,
+    **engine_options(),
 )
+instrument_engine(engine.sync_engine)
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
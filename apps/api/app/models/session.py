@@ -0,0 +1,53 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, String
+from sqlmodel import Field, SQLModel
+from ulid import ULID
+
+
+class RevocationReason(str, Enum):
+    """Why a refresh session was revoked."""
+
+    ROTATED = "rotated"  # its token was exchanged for a new session
+    LOGOUT = "logout"
+    SIGNED_OUT = "signed_out"  # all sessions ended (admin, role change, reuse)
+
+
+class RefreshSession(SQLModel, table=True):
+    """
+    Refresh token session, one row per signed-in device.
+
+    Only a SHA-256 hash of the refresh token is stored. Sessions are
+    rotated on every refresh: the used row is revoked and a new one is
+    issued, so a replayed token can be detected. Only replaying a token
+    whose session was rotated counts as reuse; `revoked_reason` tells
+    rotation apart from logout.
+    """
+
+    __tablename__ = "refresh_sessions"
+
+    id: str = Field(
+        default_factory=lambda: str(ULID()),
+        primary_key=True,
+        max_length=26,
+    )
+    user_id: str = Field(
+        foreign_key="users.id", ondelete="CASCADE", index=True, max_length=26
+    )
+    token_hash: str = Field(unique=True, index=True, max_length=64)
+    device: Optional[str] = Field(default=None, max_length=255)
+
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    expires_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+    revoked_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    revoked_reason: Optional[RevocationReason] = Field(
+        default=None, sa_column=Column(String(16), nullable=True)
+    )
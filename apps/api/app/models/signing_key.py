@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime
+from sqlmodel import Field, SQLModel
+from ulid import ULID
+
+
+class SigningKey(SQLModel, table=True):
+    """
+    Asymmetric JWT signing key, identified in token headers by `kid`.
+
+    The newest key whose `activates_at` has passed signs new tokens; all
+    stored keys stay published in the JWKS so tokens signed before a
+    rotation keep verifying until they expire. The private key is a PEM
+    encrypted with `settings.secret_key`.
+    """
+
+    __tablename__ = "signing_keys"
+
+    kid: str = Field(
+        default_factory=lambda: str(ULID()),
+        primary_key=True,
+        max_length=26,
+    )
+    algorithm: str = Field(max_length=10)
+    private_key: str
+    public_jwk: dict = Field(sa_column=Column(JSON, nullable=False))
+
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    activates_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
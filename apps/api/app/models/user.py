@@ -1,7 +1,8 @@
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field
 from typing import Optional
 from ulid import ULID
-from enum import Enum
+from enum import Enum, IntFlag
 
 
 class UserRole(str, Enum):
@@ -12,6 +13,36 @@ class UserRole(str, Enum):
     MODERATOR = "MODERATOR"
 
 
+ROLE_HIERARCHY = {
+    UserRole.USER: 0,
+    UserRole.MODERATOR: 1,
+    UserRole.ADMIN: 2,
+}
+
+
+class Permission(IntFlag):
+    """
+    Fine-grained permissions, granted through roles.
+
+    A role's permissions are embedded in access tokens as one integer
+    (`perm` claim), so checks are a single bitwise AND. Only append new
+    members: existing bit values are baked into issued tokens.
+    """
+
+    USERS_LOOKUP = 1 << 0
+    USERS_LIST = 1 << 1
+    USERS_EXPORT = 1 << 2
+    USERS_MANAGE_ROLES = 1 << 3
+    USERS_REVOKE_TOKENS = 1 << 4
+
+
+ROLE_PERMISSIONS = {
+    UserRole.USER: Permission(0),
+    UserRole.MODERATOR: Permission.USERS_LOOKUP,
+    UserRole.ADMIN: ~Permission(0),
+}
+
+
 class User(SQLModel, table=True):
     """
     User model for authentication and profile.
@@ -22,6 +53,22 @@ class User(SQLModel, table=True):
     """
 
     __tablename__ = "users"
+    __table_args__ = (
+        # Case-insensitive prefix search (lower(email) LIKE 'abc%')
+        Index("ix_users_email_lower_prefix", text("lower(email) text_pattern_ops")),
+        Index(
+            "ix_users_username_lower_prefix", text("lower(username) text_pattern_ops")
+        ),
+        # Partial indexes for the rare side of admin search filters, ordered
+        # by id for keyset pagination (role filters use ix_users_role)
+        Index("ix_users_inactive", "id", postgresql_where=text("NOT is_active")),
+        Index(
+            "ix_users_oauth_provider",
+            "oauth_provider",
+            "id",
+            postgresql_where=text("oauth_provider IS NOT NULL"),
+        ),
+    )
 
     # Primary key
     id: str = Field(
@@ -39,7 +86,6 @@ class User(SQLModel, table=True):
 
     # Optional fields
     hashed_password: Optional[str] = Field(default=None)
-    refresh_token: Optional[str] = Field(default=None)
 
     # OAuth fields
     oauth_provider: Optional[str] = Field(default=None)
@@ -47,11 +93,10 @@ class User(SQLModel, table=True):
     avatar_url: Optional[str] = Field(default=None)
     full_name: Optional[str] = Field(default=None)
 
+    @property
+    def permissions(self) -> int:
+        return ROLE_PERMISSIONS[self.role]
+
     def has_role(self, required_role: UserRole) -> bool:
         """Check if user has the required role or higher privileges."""
-        role_hierarchy = {
-            UserRole.USER: 0,
-            UserRole.MODERATOR: 1,
-            UserRole.ADMIN: 2,
-        }
-        return role_hierarchy.get(self.role, 0) >= role_hierarchy.get(required_role, 0)
+        return ROLE_HIERARCHY.get(self.role, 0) >= ROLE_HIERARCHY.get(required_role, 0)
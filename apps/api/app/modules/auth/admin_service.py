@@ -0,0 +1,183 @@
+from typing import Any
+
+from fastapi import HTTPException, status as http_status
+from sqlalchemy import func, select as sa_select, text, update
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.settings import settings
+from app.models.user import User, UserRole
+from app.modules.auth.revocation import revocations
+from app.modules.auth.user_cache import user_cache
+
+# Columns admins may request; never includes secrets such as hashed_password
+USER_LIST_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "is_active",
+    "role",
+    "oauth_provider",
+    "avatar_url",
+    "full_name",
+)
+
+_ESTIMATE_USER_COUNT = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = 'users'::regclass"
+)
+
+
+def parse_fields(fields: str | None) -> list[str]:
+    """Parse a comma-separated field projection. `id` is always included."""
+    if not fields:
+        return list(USER_LIST_FIELDS)
+
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in USER_LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=http_status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return ["id", *[field for field in requested if field != "id"]]
+
+
+def prefix_match(column, prefix: str):
+    """Case-insensitive prefix match served by the lower(...) pattern indexes."""
+    escaped = (
+        prefix.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+    return func.lower(column).like(f"{escaped}%", escape="\\")
+
+
+def search_filters(
+    role: UserRole | None = None,
+    is_active: bool | None = None,
+    oauth_provider: str | None = None,
+    email: str | None = None,
+    username: str | None = None,
+) -> list:
+    """Build `list_users_page` filters for the admin user search."""
+    filters = []
+    if role is not None:
+        filters.append(col(User.role) == role)
+    if is_active is not None:
+        filters.append(col(User.is_active) == is_active)
+    if oauth_provider is not None:
+        filters.append(col(User.oauth_provider) == oauth_provider)
+    if email:
+        filters.append(prefix_match(User.email, email))
+    if username:
+        filters.append(prefix_match(User.username, username))
+    return filters
+
+
+async def approximate_user_count(db: AsyncSession) -> int | None:
+    """Row estimate from planner statistics; None if the table was never analyzed."""
+    result = await db.exec(_ESTIMATE_USER_COUNT)  # type: ignore[arg-type]
+    estimate = result.scalar_one()
+    return estimate if estimate >= 0 else None
+
+
+def users_page_query(
+    fields: list[str],
+    cursor: str | None = None,
+    limit: int = 50,
+    filters: list | None = None,
+):
+    """SELECT for one page of users; fetches one extra row to detect the next page."""
+    # Core select: rows stay rows even when only `id` is projected
+    statement = sa_select(*[getattr(User, field) for field in fields])
+    if cursor:
+        statement = statement.where(col(User.id) > cursor)
+    for condition in filters or []:
+        statement = statement.where(condition)
+    return statement.order_by(col(User.id)).limit(limit + 1)
+
+
+async def list_users_page(
+    db: AsyncSession,
+    fields: list[str],
+    cursor: str | None = None,
+    limit: int = 50,
+    filters: list | None = None,
+) -> tuple[list[dict[str, Any]], str | None]:
+    """
+    Fetch one page of users ordered by ID (keyset pagination).
+
+    The cursor is the last ID of the previous page; ULIDs sort by creation
+    time, so pages are stable while new users sign up. Only the requested
+    columns are selected. Returns the rows and the next cursor, if any.
+    """
+    result = await db.exec(users_page_query(fields, cursor, limit, filters))
+    rows = [dict(row._mapping) for row in result.all()]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1]["id"]
+    return rows, next_cursor
+
+
+async def _update_role_chunk(db: AsyncSession, role: UserRole, condition) -> list:
+    """Run one UPDATE ... RETURNING, commit and evict the changed users."""
+    result = await db.exec(
+        update(User)
+        .where(condition)
+        .values(role=role)
+        .returning(col(User.id), col(User.username), col(User.email))
+    )
+    rows = [tuple(row) for row in result.all()]
+    await db.commit()
+    await user_cache.invalidate_many(rows)
+    # Outstanding access tokens still carry the old role
+    await revocations.revoke_users([row[0] for row in rows])
+    return rows
+
+
+async def bulk_update_role(
+    db: AsyncSession,
+    role: UserRole,
+    user_ids: list[str] | None = None,
+    filters: list | None = None,
+    chunk_size: int | None = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Change the role of many users, by ID list or by search filters.
+
+    Each chunk is a single set-based UPDATE ... RETURNING committed on its
+    own, so locks stay short and a failure keeps earlier chunks. Filter
+    updates walk the matching users in ID order and skip users that
+    already have the role. Returns the updated IDs and the requested IDs
+    that do not exist.
+    """
+    chunk_size = chunk_size or settings.users_bulk_chunk_size
+    updated: list[str] = []
+
+    if user_ids is not None:
+        requested = list(dict.fromkeys(user_ids))
+        for start in range(0, len(requested), chunk_size):
+            chunk = requested[start : start + chunk_size]
+            rows = await _update_role_chunk(db, role, col(User.id).in_(chunk))
+            updated.extend(row[0] for row in rows)
+        found = set(updated)
+        return updated, [user_id for user_id in requested if user_id not in found]
+
+    cursor = None
+    while True:
+        batch = select(User.id).where(col(User.role) != role)
+        for condition in filters or []:
+            batch = batch.where(condition)
+        if cursor:
+            batch = batch.where(col(User.id) > cursor)
+        batch = batch.order_by(col(User.id)).limit(chunk_size)
+
+        rows = await _update_role_chunk(db, role, col(User.id).in_(batch))
+        if not rows:
+            break
+        ids = [row[0] for row in rows]
+        updated.extend(ids)
+        cursor = max(ids)
+        if len(rows) < chunk_size:
+            break
+    return updated, []
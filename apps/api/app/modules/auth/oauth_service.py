@@ -1,100 +1,90 @@
-import httpx
-from sqlmodel import select
-from sqlmodel.ext.asyncio.session import AsyncSession
-
-from app.models.user import User
-from app.core.settings import settings
-
+import asyncio
+import re
+from urllib.parse import urlencode
 
-def get_google_auth_url() -> str:
-    """Generate Google OAuth authorization URL."""
-    return (
-        f"https://accounts.google.com/o/oauth2/v2/auth?"
-        f"client_id={settings.google_client_id}&"
-        f"redirect_uri={settings.google_redirect_uri}&"
-        f"response_type=code&"
-        f"scope=openid email profile"
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, select, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from ulid import ULID
+
+from app.models.user import User, UserRole
+from app.core.exceptions import UserAlreadyExistsException
+from app.modules.auth.admin_service import prefix_match
+from app.modules.auth.providers import OAuthProfile, OAuthProvider
+from app.modules.auth.user_cache import user_cache
+
+# A concurrent sign-up can take the chosen username between lookup and insert
+_OAUTH_SIGNUP_ATTEMPTS = 3
+
+
+def get_auth_url(provider: OAuthProvider) -> str:
+    """Generate the provider's OAuth authorization URL."""
+    params = {
+        "client_id": provider.client_id,
+        "redirect_uri": provider.redirect_uri,
+        "response_type": "code",
+        "scope": provider.scope,
+    }
+    return f"{provider.authorize_url}?{urlencode(params)}"
+
+
+async def exchange_code(provider: OAuthProvider, code: str) -> dict:
+    """Exchange an authorization code for the provider's tokens."""
+    response = await provider.http.post(
+        provider.token_url,
+        data={
+            "code": code,
+            "client_id": provider.client_id,
+            "client_secret": provider.client_secret,
+            "redirect_uri": provider.redirect_uri,
+            "grant_type": "authorization_code",
+        },
+        headers={"Accept": "application/json"},
     )
+    response.raise_for_status()
+    return response.json()
 
 
-def get_github_auth_url() -> str:
-    """Generate GitHub OAuth authorization URL."""
-    return (
-        f"https://github.com/login/oauth/authorize?"
-        f"client_id={settings.github_client_id}&"
-        f"redirect_uri={settings.github_redirect_uri}&"
-        f"scope=user:email read:user"
+async def _fetch_json(provider: OAuthProvider, url: str, access_token: str):
+    response = await provider.http.get(
+        url, headers={"Authorization": f"Bearer {access_token}"}
     )
+    response.raise_for_status()
+    return response.json()
 
 
-async def exchange_google_code(code: str) -> dict:
-    """Exchange Google authorization code for access token."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://oauth2.googleapis.com/token",
-            data={
-                "code": code,
-                "client_id": settings.google_client_id,
-                "client_secret": settings.google_client_secret,
-                "redirect_uri": settings.google_redirect_uri,
-                "grant_type": "authorization_code",
-            },
-        )
-        response.raise_for_status()
-        return response.json()
-
-
-async def exchange_github_code(code: str) -> dict:
-    """Exchange GitHub authorization code for access token."""
-    async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://github.com/login/oauth/access_token",
-            data={
-                "code": code,
-                "client_id": settings.github_client_id,
-                "client_secret": settings.github_client_secret,
-            },
-            headers={"Accept": "application/json"},
-        )
-        response.raise_for_status()
-        return response.json()
+async def fetch_profile(provider: OAuthProvider, token_data: dict) -> OAuthProfile:
+    """
+    Resolve the signed-in account from the token response.
 
+    A verified ID token is used directly; otherwise the provider's profile
+    endpoints are fetched concurrently.
+    """
+    access_token = token_data.get("access_token")
+    if not access_token:
+        raise ValueError(f"No access token received from {provider.title}")
 
-async def get_google_user_info(access_token: str) -> dict:
-    """Get user information from Google."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://www.googleapis.com/oauth2/v2/userinfo",
-            headers={"Authorization": f"Bearer {access_token}"},
+    id_token = token_data.get("id_token")
+    if provider.oidc is not None and id_token:
+        claims = await provider.oidc.verify_id_token(
+            id_token, audience=provider.client_id, access_token=access_token
         )
-        response.raise_for_status()
-        return response.json()
-
+        return provider.map_profile(claims, [])
 
-async def get_github_user_info(access_token: str) -> dict:
-    """Get user information from GitHub."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        response.raise_for_status()
-        return response.json()
+    responses = await asyncio.gather(
+        *[_fetch_json(provider, url, access_token) for url in provider.profile_urls]
+    )
+    return provider.map_profile(None, list(responses))
 
 
-async def get_github_user_email(access_token: str) -> dict:
-    """Get user email from GitHub."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            "https://api.github.com/user/emails",
-            headers={"Authorization": f"Bearer {access_token}"},
-        )
-        response.raise_for_status()
-        emails = response.json()
-        for email in emails:
-            if email.get("primary"):
-                return email
-        return emails[0] if emails else {}
+def _first_free_username(base: str, taken: set[str]) -> str:
+    """Return `base`, or `base1`, `base2`, ... whichever is first not taken."""
+    username = base
+    counter = 1
+    while username in taken:
+        username = f"{base}{counter}"
+        counter += 1
+    return username
 
 
 async def get_or_create_oauth_user(
@@ -106,107 +96,103 @@ async def get_or_create_oauth_user(
     avatar_url: str | None,
     full_name: str | None,
 ) -> User:
-    """Get existing OAuth user or create a new one."""
-    result = await db.exec(
-        select(User).where(
-            User.oauth_provider == provider,
-            User.oauth_provider_id == provider_id,
-        )
-    )
-    user = result.one_or_none()
-
-    if user:
-        return user
-
-    result = await db.exec(select(User).where(User.email == email))
-    user = result.one_or_none()
-
-    if user:
-        user.oauth_provider = provider
-        user.oauth_provider_id = provider_id
-        user.avatar_url = avatar_url or user.avatar_url
-        user.full_name = full_name or user.full_name
-        await db.commit()
-        await db.refresh(user)
-        return user
-
+    """
+    Get existing OAuth user or create a new one.
+
+    One query fetches the user linked to this provider account and the
+    user with the same email; the account is then either returned, linked
+    with one UPDATE or created with one INSERT. A new account gets the
+    first free username among `username`, `username1`, ..., found by
+    fetching only the names of that exact form.
+    """
     if not username:
         username = f"{provider}_{provider_id}"
 
-    original_username = username
-    counter = 1
-    while True:
-        result = await db.exec(select(User).where(User.username == username))
-        if not result.one_or_none():
-            break
-        username = f"{original_username}{counter}"
-        counter += 1
-
-    new_user = User(
-        email=email,
-        username=username,
-        oauth_provider=provider,
-        oauth_provider_id=provider_id,
-        avatar_url=avatar_url,
-        full_name=full_name,
-        hashed_password=None,
-    )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
-    return new_user
-
-
-async def handle_google_callback(db: AsyncSession, code: str) -> User:
-    """Handle Google OAuth callback."""
-    token_data = await exchange_google_code(code)
-    access_token = token_data.get("access_token")
-
-    if not access_token:
-        raise ValueError("No access token received from Google")
-
-    user_info = await get_google_user_info(access_token)
-
-    email = user_info.get("email", "")
-    provider_id = user_info.get("id", "")
-    username = user_info.get("given_name", "").lower()
-    avatar_url = user_info.get("picture")
-    full_name = user_info.get("name")
-
-    return await get_or_create_oauth_user(
-        db,
-        provider="google",
-        provider_id=provider_id,
-        email=email,
-        username=username,
-        avatar_url=avatar_url,
-        full_name=full_name,
-    )
-
-
-async def handle_github_callback(db: AsyncSession, code: str) -> User:
-    """Handle GitHub OAuth callback."""
-    token_data = await exchange_github_code(code)
-    access_token = token_data.get("access_token")
+    for _ in range(_OAUTH_SIGNUP_ATTEMPTS):
+        result = await db.exec(
+            select(User).where(
+                (
+                    (col(User.oauth_provider) == provider)
+                    & (col(User.oauth_provider_id) == provider_id)
+                )
+                | (col(User.email) == email)
+            )
+        )
+        candidates = result.all()
+
+        for user in candidates:
+            if (
+                user.oauth_provider == provider
+                and user.oauth_provider_id == provider_id
+            ):
+                return user
+
+        for user in candidates:
+            if user.email == email:
+                result = await db.exec(
+                    update(User)
+                    .where(col(User.id) == user.id)
+                    .values(
+                        oauth_provider=provider,
+                        oauth_provider_id=provider_id,
+                        avatar_url=avatar_url or user.avatar_url,
+                        full_name=full_name or user.full_name,
+                    )
+                    .returning(User)
+                )
+                linked = result.scalars().one()
+                await db.commit()
+                await user_cache.invalidate_user(linked)
+                return linked
+
+        result = await db.exec(
+            select(User.username).where(
+                # The prefix match lets the pattern index narrow the scan
+                prefix_match(User.username, username),
+                col(User.username).regexp_match(f"^{re.escape(username)}[0-9]*$"),
+            )
+        )
+        taken = set(result.all())
+        result = await db.exec(
+            insert(User)
+            .values(
+                id=str(ULID()),
+                email=email,
+                username=_first_free_username(username, taken),
+                oauth_provider=provider,
+                oauth_provider_id=provider_id,
+                avatar_url=avatar_url,
+                full_name=full_name,
+                hashed_password=None,
+                is_active=True,
+                role=UserRole.USER,
+            )
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        new_user = result.scalars().one_or_none()
+        if new_user is not None:
+            await db.commit()
+            return new_user
+        await db.rollback()
 
-    if not access_token:
-        raise ValueError("No access token received from GitHub")
+    raise UserAlreadyExistsException()
 
-    user_info = await get_github_user_info(access_token)
-    email_info = await get_github_user_email(access_token)
 
-    email = email_info.get("email", user_info.get("email", ""))
-    provider_id = str(user_info.get("id", ""))
-    username = user_info.get("login", "")
-    avatar_url = user_info.get("avatar_url")
-    full_name = user_info.get("name")
+async def handle_oauth_callback(
+    db: AsyncSession, provider: OAuthProvider, code: str
+) -> User:
+    """Handle an OAuth callback: exchange the code, fetch the profile, sign in."""
+    async with provider.slot():
+        token_data = await exchange_code(provider, code)
+        profile = await fetch_profile(provider, token_data)
 
     return await get_or_create_oauth_user(
         db,
-        provider="github",
-        provider_id=provider_id,
-        email=email,
-        username=username,
-        avatar_url=avatar_url,
-        full_name=full_name,
+        provider=provider.name,
+        provider_id=profile.provider_id,
+        email=profile.email,
+        username=profile.username,
+        avatar_url=profile.avatar_url,
+        full_name=profile.full_name,
     )
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import re
+import time
+
+import httpx
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+from app.core.exceptions import AuthenticationException
+from app.core.http import HttpClient
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+def _max_age(cache_control: str | None, default: int) -> int:
+    """Cache lifetime from a Cache-Control header, or the default."""
+    match = _MAX_AGE.search(cache_control or "")
+    return int(match.group(1)) if match else default
+
+
+class OpenIDProvider:
+    """
+    OpenID Connect provider with locally verified ID tokens.
+
+    The discovery document and the signing keys (JWKS) are fetched once
+    and cached. Stale keys keep being served while a background task
+    refreshes them; a token signed with an unknown `kid` forces a refresh,
+    rate limited so forged tokens cannot hammer the provider.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        issuers: tuple[str, ...],
+        discovery_url: str,
+        http: HttpClient,
+    ):
+        self.name = name
+        self.issuers = issuers
+        self.discovery_url = discovery_url
+        self.http = http
+        self._discovery: dict | None = None
+        self._discovery_expires_at = 0.0
+        self._keys: dict[str, dict] = {}
+        self._keys_expires_at = 0.0
+        self._keys_fetched_at = 0.0
+        self._refresh: asyncio.Task | None = None
+        self._background: asyncio.Task | None = None
+
+    async def discovery(self) -> dict:
+        """Return the cached OpenID discovery document."""
+        if self._discovery is None or time.time() >= self._discovery_expires_at:
+            response = await self.http.get(self.discovery_url)
+            response.raise_for_status()
+            self._discovery = response.json()
+            self._discovery_expires_at = time.time() + _max_age(
+                response.headers.get("cache-control"),
+                settings.oidc_discovery_ttl_seconds,
+            )
+        return self._discovery
+
+    async def _fetch_keys(self):
+        document = await self.discovery()
+        response = await self.http.get(document["jwks_uri"])
+        response.raise_for_status()
+        self._keys = {key["kid"]: key for key in response.json()["keys"]}
+        self._keys_fetched_at = time.time()
+        self._keys_expires_at = self._keys_fetched_at + _max_age(
+            response.headers.get("cache-control"), settings.oidc_jwks_ttl_seconds
+        )
+        logger.info(f"Loaded {len(self._keys)} signing keys for {self.name}")
+
+    async def _refresh_keys(self):
+        """Refresh the JWKS once, sharing an in-flight refresh."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._fetch_keys())
+        await asyncio.shield(self._refresh)
+
+    def _refresh_in_background(self):
+        async def refresh():
+            try:
+                await self._refresh_keys()
+            except (httpx.HTTPError, HTTPException, KeyError, ValueError) as e:
+                # Unreachable provider, open circuit or malformed documents
+                logger.warning(f"Background JWKS refresh for {self.name} failed: {e}")
+
+        if self._refresh is None or self._refresh.done():
+            # Keep a reference so the task is not garbage collected mid-flight
+            self._background = asyncio.create_task(refresh())
+
+    async def signing_key(self, kid: str) -> dict:
+        """Return the JWK for `kid`, refreshing the key set when needed."""
+        if not self._keys:
+            await self._refresh_keys()
+        elif time.time() >= self._keys_expires_at:
+            self._refresh_in_background()
+
+        key = self._keys.get(kid)
+        if key is None and (
+            time.time() - self._keys_fetched_at
+            >= settings.oidc_jwks_min_refresh_seconds
+        ):
+            # Keys may have been rotated since the last fetch
+            await self._refresh_keys()
+            key = self._keys.get(kid)
+        if key is None:
+            raise AuthenticationException(f"Unknown {self.name} signing key")
+        return key
+
+    async def verify_id_token(
+        self, id_token: str, audience: str, access_token: str | None = None
+    ) -> dict:
+        """
+        Verify an ID token's signature, issuer, audience and expiry locally.
+
+        Passing the access token issued alongside also checks `at_hash`.
+        """
+        try:
+            header = jwt.get_unverified_header(id_token)
+        except JWTError:
+            raise AuthenticationException(f"Invalid {self.name} ID token")
+
+        algorithm = header.get("alg", "")
+        supported = (await self.discovery()).get(
+            "id_token_signing_alg_values_supported", ["RS256"]
+        )
+        # Never accept unsigned or shared-secret tokens from a provider
+        if (
+            algorithm not in supported
+            or algorithm == "none"
+            or algorithm.startswith("HS")
+        ):
+            raise AuthenticationException(f"Invalid {self.name} ID token")
+
+        key = await self.signing_key(header.get("kid", ""))
+        try:
+            return jwt.decode(
+                id_token,
+                key,
+                algorithms=[algorithm],
+                audience=audience,
+                issuer=self.issuers,
+                access_token=access_token,
+            )
+        except JWTError as e:
+            logger.warning(f"{self.name} ID token rejected: {e}")
+            raise AuthenticationException(f"Invalid {self.name} ID token")
@@ -0,0 +1,37 @@
+from dataclasses import dataclass
+
+from app.models.user import ROLE_HIERARCHY, ROLE_PERMISSIONS, UserRole
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """
+    Lightweight authenticated identity built from access token claims.
+
+    Exposes the subset of `User` that authorization checks need, so
+    role-guarded endpoints can run without loading the user row.
+    """
+
+    id: str
+    username: str
+    role: UserRole
+    permissions: int
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> "Principal | None":
+        """Build a principal from a verified token payload, if it has the claims."""
+        user_id = payload.get("uid")
+        username = payload.get("sub")
+        role = payload.get("role")
+        if not user_id or not username or role not in UserRole.__members__:
+            return None
+        role = UserRole(role)
+        # Tokens issued before permissions were embedded fall back to the role
+        permissions = payload.get("perm")
+        if not isinstance(permissions, int):
+            permissions = ROLE_PERMISSIONS[role]
+        return cls(id=user_id, username=username, role=role, permissions=permissions)
+
+    def has_role(self, required_role: UserRole) -> bool:
+        """Check if principal has the required role or higher privileges."""
+        return ROLE_HIERARCHY.get(self.role, 0) >= ROLE_HIERARCHY.get(required_role, 0)
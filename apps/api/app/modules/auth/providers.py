@@ -0,0 +1,154 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.exceptions import ServiceUnavailableException
+from app.core.http import HttpClient
+from app.core.metrics import metrics
+from app.core.settings import settings
+from app.modules.auth.oidc import OpenIDProvider
+
+
+@dataclass(frozen=True, slots=True)
+class OAuthProfile:
+    """Provider-independent view of the signed-in account."""
+
+    provider_id: str
+    email: str
+    username: str | None
+    avatar_url: str | None
+    full_name: str | None
+
+
+@dataclass(eq=False)
+class OAuthProvider:
+    """
+    Declarative description of an OAuth provider.
+
+    `profile_urls` are fetched concurrently after the code exchange and
+    handed to `map_profile` together with the verified ID token claims
+    (providers with `oidc` skip the fetches when an ID token is returned).
+    Each provider has its own connection pool and a concurrency limit, so
+    a slow provider queues its own callbacks without affecting the others.
+    """
+
+    name: str
+    title: str
+    authorize_url: str
+    token_url: str
+    scope: str
+    map_profile: Callable[[dict | None, list[Any]], OAuthProfile]
+    profile_urls: tuple[str, ...] = ()
+    oidc_issuers: tuple[str, ...] = ()
+    discovery_url: str | None = None
+    max_connections: int = field(default_factory=lambda: settings.oauth_max_connections)
+    max_concurrency: int = field(default_factory=lambda: settings.oauth_max_concurrency)
+
+    def __post_init__(self):
+        self.http = HttpClient(self.name, max_connections=self.max_connections)
+        self.oidc = (
+            OpenIDProvider(self.title, self.oidc_issuers, self.discovery_url, self.http)
+            if self.discovery_url
+            else None
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def client_id(self) -> str:
+        return getattr(settings, f"{self.name}_client_id")
+
+    @property
+    def client_secret(self) -> str:
+        return getattr(settings, f"{self.name}_client_secret")
+
+    @property
+    def redirect_uri(self) -> str:
+        return getattr(settings, f"{self.name}_redirect_uri")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the provider's concurrency slots, or fail with a 503."""
+        try:
+            await asyncio.wait_for(
+                self._slots.acquire(), settings.oauth_queue_timeout_seconds
+            )
+        except TimeoutError:
+            metrics.counter(
+                "oauth_provider_rejected_total",
+                "OAuth callbacks rejected because the provider limit was reached",
+                labels={"provider": self.name},
+            ).inc()
+            raise ServiceUnavailableException(detail=f"{self.title} sign-in is busy")
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+
+def _map_google_profile(claims: dict | None, responses: list[Any]) -> OAuthProfile:
+    # ID token claims use `sub`; the userinfo fallback calls the same value `id`
+    info = claims if claims is not None else responses[0]
+    return OAuthProfile(
+        provider_id=info.get("sub") or info.get("id", ""),
+        email=info.get("email", ""),
+        username=info.get("given_name", "").lower(),
+        avatar_url=info.get("picture"),
+        full_name=info.get("name"),
+    )
+
+
+def _map_github_profile(claims: dict | None, responses: list[Any]) -> OAuthProfile:
+    user_info, emails = responses
+    primary = next((email for email in emails if email.get("primary")), None)
+    email_info = primary or (emails[0] if emails else {})
+    return OAuthProfile(
+        provider_id=str(user_info.get("id", "")),
+        email=email_info.get("email", user_info.get("email", "")),
+        username=user_info.get("login", ""),
+        avatar_url=user_info.get("avatar_url"),
+        full_name=user_info.get("name"),
+    )
+
+
+PROVIDERS: dict[str, OAuthProvider] = {
+    provider.name: provider
+    for provider in (
+        OAuthProvider(
+            name="google",
+            title="Google",
+            authorize_url="https://accounts.google.com/o/oauth2/v2/auth",
+            token_url="https://oauth2.googleapis.com/token",
+            scope="openid email profile",
+            map_profile=_map_google_profile,
+            profile_urls=("https://www.googleapis.com/oauth2/v2/userinfo",),
+            oidc_issuers=("https://accounts.google.com", "accounts.google.com"),
+            discovery_url="https://accounts.google.com/.well-known/openid-configuration",
+        ),
+        OAuthProvider(
+            name="github",
+            title="GitHub",
+            authorize_url="https://github.com/login/oauth/authorize",
+            token_url="https://github.com/login/oauth/access_token",
+            scope="user:email read:user",
+            map_profile=_map_github_profile,
+            profile_urls=(
+                "https://api.github.com/user",
+                "https://api.github.com/user/emails",
+            ),
+        ),
+    )
+}
+
+
+async def initialize_providers():
+    """Open every provider's connection pool (called on application startup)."""
+    for provider in PROVIDERS.values():
+        await provider.http.initialize()
+
+
+async def cleanup_providers():
+    """Close every provider's connection pool (called on application shutdown)."""
+    for provider in PROVIDERS.values():
+        await provider.http.cleanup()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from ulid import ULID
+
+from app.core.bloom import BloomFilter
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "auth:revocations"
+# jti -> token expiry (sorted set, so expired entries can be trimmed)
+REVOKED_TOKENS_KEY = "auth:revoked-tokens"
+# user ID -> epoch milliseconds before which the user's tokens are revoked
+REVOKED_USERS_KEY = "auth:revoked-users"
+
+
+def _issued_at_ms(payload: dict) -> int:
+    """Issue time of a token in milliseconds, from the timestamp in its `jti`."""
+    jti = payload.get("jti")
+    if not isinstance(jti, str):
+        # Issued before tokens carried a jti
+        return 0
+    try:
+        return ULID.from_str(jti).milliseconds
+    except ValueError:
+        return 0
+
+
+class RevocationList:
+    """
+    Revoked access tokens, checked without network I/O.
+
+    Single tokens are revoked by `jti`, and all of a user's tokens by a
+    watermark: tokens issued before it are rejected. Both are stored in
+    Redis and broadcast over Pub/Sub. Every process keeps the watermarks in
+    a dict and the revoked jtis in a Bloom filter, so checking a token that
+    is not revoked costs a hash and a few bit tests. Only a Bloom filter
+    hit (a revoked token or a rare false positive) asks Redis.
+
+    The filter and watermarks are rebuilt from Redis periodically and after
+    the listener reconnects, which also drops entries whose tokens have
+    expired. Revocation stays disabled (nothing is revoked) until
+    `initialize()` runs in the app lifespan.
+    """
+
+    def __init__(self):
+        self.redis: Redis | None = None
+        self._filter = BloomFilter(
+            settings.revocation_bloom_capacity, settings.revocation_bloom_error_rate
+        )
+        self._watermarks: dict[str, int] = {}
+        # Updates received while a rebuild is loading, replayed on its result
+        self._missed: list[dict] | None = None
+        self._rebuild_lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+        self._rebuilder: asyncio.Task | None = None
+        self._bloom_hits = {
+            result: metrics.counter(
+                "token_revocation_bloom_hits_total",
+                "Revocation Bloom filter hits confirmed against Redis",
+                labels={"result": result},
+            )
+            for result in ("revoked", "false_positive")
+        }
+        self._size = metrics.gauge(
+            "token_revocation_entries",
+            "Revocations added to the local Bloom filter since its last rebuild",
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None
+
+    async def initialize(self):
+        """Load the revocations and start following updates."""
+        if not settings.revocation_enabled:
+            return
+        self.redis = Redis.from_url(settings.redis_url)
+        await self.rebuild()
+        self._listener = asyncio.create_task(self._listen())
+        self._rebuilder = asyncio.create_task(self._rebuild_periodically())
+
+    async def is_revoked(self, payload: dict) -> bool:
+        """Whether a verified access token payload has been revoked."""
+        if self.redis is None:
+            return False
+
+        watermark = self._watermarks.get(payload.get("uid"))
+        if watermark is not None and _issued_at_ms(payload) < watermark:
+            return True
+
+        jti = payload.get("jti")
+        if jti is None or jti not in self._filter:
+            return False
+        try:
+            revoked = await self.redis.zscore(REVOKED_TOKENS_KEY, jti) is not None
+        except RedisError as e:
+            # Fail closed: the filter says the token may be revoked
+            logger.warning(f"Token revocation lookup failed: {e}")
+            return True
+        self._bloom_hits["revoked" if revoked else "false_positive"].inc()
+        return revoked
+
+    async def revoke_token(self, jti: str, expires_at: float):
+        """Revoke one access token until it expires."""
+        await self._publish(
+            {"jti": jti, "exp": expires_at},
+            lambda pipe: pipe.zadd(REVOKED_TOKENS_KEY, {jti: expires_at}),
+        )
+
+    async def revoke_users(self, user_ids: list[str]):
+        """Revoke every access token issued to these users so far."""
+        if not user_ids:
+            return
+        before = int(time.time() * 1000) + 1
+        await self._publish(
+            {"users": user_ids, "before": before},
+            lambda pipe: pipe.hset(
+                REVOKED_USERS_KEY, mapping=dict.fromkeys(user_ids, before)
+            ),
+        )
+
+    async def _publish(self, update: dict, store):
+        if self.redis is None:
+            return
+        self._apply(update)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                store(pipe)
+                pipe.publish(REVOCATION_CHANNEL, json.dumps(update))
+                await pipe.execute()
+        except RedisError as e:
+            logger.error(f"Storing token revocation failed: {e}")
+            raise
+
+    def _apply(self, update: dict):
+        if self._missed is not None:
+            self._missed.append(update)
+        if "jti" in update:
+            self._filter.add(update["jti"])
+            self._size.set(self._filter.count)
+        else:
+            for user_id in update["users"]:
+                before = max(self._watermarks.get(user_id, 0), update["before"])
+                self._watermarks[user_id] = before
+
+    async def rebuild(self):
+        """Reload revocations from Redis, dropping those of expired tokens."""
+        async with self._rebuild_lock:
+            await self._rebuild()
+        self._size.set(self._filter.count)
+
+    async def _rebuild(self):
+        now = time.time()
+        # Watermarks only matter while tokens issued before them are valid
+        oldest = int((now - settings.access_token_expire_minutes * 60) * 1000)
+
+        self._missed = []
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.zremrangebyscore(REVOKED_TOKENS_KEY, "-inf", now)
+                pipe.zrange(REVOKED_TOKENS_KEY, 0, -1)
+                pipe.hgetall(REVOKED_USERS_KEY)
+                _, jtis, watermarks = await pipe.execute()
+
+            expired = [uid for uid, ms in watermarks.items() if int(ms) < oldest]
+            if expired:
+                await self.redis.hdel(REVOKED_USERS_KEY, *expired)
+
+            bloom = BloomFilter(
+                max(settings.revocation_bloom_capacity, len(jtis) * 2),
+                settings.revocation_bloom_error_rate,
+            )
+            for jti in jtis:
+                bloom.add(jti.decode())
+            missed, self._missed = self._missed, None
+            self._filter = bloom
+            self._watermarks = {
+                uid.decode(): int(ms)
+                for uid, ms in watermarks.items()
+                if int(ms) >= oldest
+            }
+            for update in missed:
+                self._apply(update)
+        finally:
+            self._missed = None
+
+    async def _rebuild_periodically(self):
+        while True:
+            await asyncio.sleep(settings.revocation_rebuild_seconds)
+            try:
+                await self.rebuild()
+            except (RedisError, ValueError) as e:
+                logger.error(f"Rebuilding the token revocation list failed: {e}")
+
+    async def _listen(self):
+        """Apply revocations published by other processes."""
+        while True:
+            pubsub_redis = Redis.from_url(settings.redis_url)
+            pubsub = pubsub_redis.pubsub()
+            try:
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                # Updates may have been missed while (re)connecting
+                await self.rebuild()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        self._apply(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            # The listener must outlive any failure, including malformed
+            # messages; it resubscribes and rebuilds after every error
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"Token revocation listener failed: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await pubsub_redis.aclose()
+
+    async def cleanup(self):
+        for task in (self._listener, self._rebuilder):
+            if task:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._listener = self._rebuilder = None
+        if self.redis:
+            await self.redis.aclose()
+            self.redis = None
+
+
+revocations = RevocationList()
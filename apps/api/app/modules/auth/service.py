@@ -1,55 +1,124 @@
-from datetime import timedelta
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 from fastapi import Depends
 from fastapi.security import OAuth2PasswordBearer
-from sqlmodel import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import col, select, update
 from sqlmodel.ext.asyncio.session import AsyncSession
+from ulid import ULID
 
-from app.models.user import User, UserRole
-from app.models.database import get_db
+from app.models.session import RefreshSession, RevocationReason
+from app.models.user import ROLE_PERMISSIONS, Permission, User, UserRole
+from app.models.database import AsyncSessionLocal, get_db
+from app.core.hashing import hasher
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token,
     decode_access_token,
     create_refresh_token,
     decode_refresh_token,
+    hash_token,
 )
 from app.core.settings import settings
+from app.core.singleflight import SingleFlight
+from app.modules.auth.principal import Principal
+from app.modules.auth.revocation import revocations
+from app.modules.auth.user_cache import user_cache
 from app.core.exceptions import (
     AuthenticationException,
     UserAlreadyExistsException,
     InactiveUserException,
+    ServiceUnavailableException,
 )
 from fastapi import HTTPException, status as http_status
 
+logger = logging.getLogger(__name__)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# Concurrent lookups of the same user share one query
+_user_lookups = SingleFlight("user_lookup")
+
+
+async def _get_user_by(db: AsyncSession, field: str, value: str) -> User | None:
+    """
+    Look a user up by a unique field.
+
+    Reads through the user cache; concurrent misses for the same key are
+    collapsed into one query. The returned user is detached from `db` and
+    may be shared with other callers, so it must not be mutated.
+    Users are returned without `hashed_password` when served from the cache.
+    """
+    user = await user_cache.get(field, value)
+    if user is not None:
+        return user
+
+    async def load() -> User | None:
+        versions = await user_cache.versions(field, [value])
+        result = await db.exec(select(User).where(getattr(User, field) == value))
+        user = result.one_or_none()
+        if user is not None:
+            # Shared with callers on other sessions: detach it from this one
+            db.expunge(user)
+            await user_cache.set(user, versions)
+        return user
+
+    return await _user_lookups.do((field, value), load)
 
 
 async def get_user_by_username(db: AsyncSession, username: str) -> User | None:
     """Get user by username."""
-    result = await db.exec(select(User).where(User.username == username))
-    return result.one_or_none()
+    return await _get_user_by(db, "username", username)
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Get user by email."""
-    result = await db.exec(select(User).where(User.email == email))
-    return result.one_or_none()
+    return await _get_user_by(db, "email", email)
 
 
 async def get_user_by_id(db: AsyncSession, user_id: str) -> User | None:
     """Get user by ID."""
-    result = await db.exec(select(User).where(User.id == user_id))
-    return result.one_or_none()
+    return await _get_user_by(db, "id", user_id)
 
 
-async def check_user_exists(db: AsyncSession, email: str, username: str) -> bool:
-    """Check if user with email or username already exists."""
-    result = await db.exec(
-        select(User).where((User.email == email) | (User.username == username))
-    )
-    return result.one_or_none() is not None
+async def get_users_by_ids_or_usernames(
+    db: AsyncSession, ids: list[str], usernames: list[str]
+) -> dict[str, User]:
+    """
+    Resolve many users at once, keyed by ID.
+
+    Cached users are served from the user cache; the rest are loaded with
+    one IN query and written back to the cache. Unknown IDs and usernames
+    are left out of the result.
+    """
+    ids = list(dict.fromkeys(ids))
+    usernames = list(dict.fromkeys(usernames))
+    cached_by_id = await user_cache.get_many("id", ids)
+    cached_by_username = await user_cache.get_many("username", usernames)
+
+    users = {user.id: user for user in cached_by_id.values()}
+    users.update({user.id: user for user in cached_by_username.values()})
+
+    missing_ids = [user_id for user_id in ids if user_id not in cached_by_id]
+    missing_usernames = [
+        username for username in usernames if username not in cached_by_username
+    ]
+    if missing_ids or missing_usernames:
+        versions = await user_cache.versions("id", missing_ids)
+        versions |= await user_cache.versions("username", missing_usernames)
+        result = await db.exec(
+            select(User).where(
+                col(User.id).in_(missing_ids)
+                | col(User.username).in_(missing_usernames)
+            )
+        )
+        loaded = result.all()
+        await user_cache.set_many(loaded, versions)
+        users.update({user.id: user for user in loaded})
+    return users
 
 
 async def create_user(
@@ -59,67 +128,153 @@ async def create_user(
     password: str,
     role: UserRole = UserRole.USER,
 ) -> User:
-    """Create a new user with specified role (defaults to USER)."""
-    # Check if user already exists
-    if await check_user_exists(db, email, username):
-        raise UserAlreadyExistsException()
+    """
+    Create a new user with specified role (defaults to USER).
 
-    # Create new user
-    hashed_password = get_password_hash(password)
-    new_user = User(
-        email=email,
-        username=username,
-        hashed_password=hashed_password,
-        role=role,
+    Runs as a single INSERT ... ON CONFLICT DO NOTHING RETURNING, so an
+    existing email or username (including one inserted by a concurrent
+    registration) raises UserAlreadyExistsException atomically.
+    """
+    hashed_password = await hasher.hash(password)
+    result = await db.exec(
+        insert(User)
+        .values(
+            id=str(ULID()),
+            email=email,
+            username=username,
+            hashed_password=hashed_password,
+            role=role,
+            is_active=True,
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
     )
-    db.add(new_user)
+    new_user = result.scalars().one_or_none()
+    if new_user is None:
+        await db.rollback()
+        raise UserAlreadyExistsException()
+
     await db.commit()
-    await db.refresh(new_user)
     return new_user
 
 
+# Background password rehashes by user ID; also keeps the tasks referenced
+_rehashes: dict[str, asyncio.Task] = {}
+
+
+async def _rehash_password(user: User, password: str):
+    """Store a password again under the current hashing policy."""
+    try:
+        hashed_password = await hasher.hash(password)
+    except ServiceUnavailableException:
+        # Hashing workers are saturated; a later login will retry
+        return
+
+    try:
+        async with AsyncSessionLocal() as db:
+            result = await db.exec(
+                update(User)
+                # Leave the row alone if the password changed in the meantime
+                .where(
+                    col(User.id) == user.id,
+                    col(User.hashed_password) == user.hashed_password,
+                )
+                .values(hashed_password=hashed_password)
+            )
+            await db.commit()
+    except (SQLAlchemyError, OSError) as e:
+        logger.warning(f"Rehashing the password of user {user.id} failed: {e}")
+        return
+
+    if result.rowcount:
+        await user_cache.invalidate_user(user)
+        logger.info(f"Rehashed the password of user {user.id}")
+
+
+def _schedule_rehash(user: User, password: str):
+    if user.id in _rehashes:
+        return
+    task = asyncio.create_task(_rehash_password(user, password))
+    _rehashes[user.id] = task
+    task.add_done_callback(lambda _: _rehashes.pop(user.id, None))
+
+
 async def authenticate_user(db: AsyncSession, username: str, password: str) -> User:
-    """Authenticate user with username and password."""
-    user = await get_user_by_username(db, username)
+    """
+    Authenticate user with username and password.
+
+    A password stored with an outdated hashing policy is rehashed in the
+    background, so the login itself does not pay for a second hash. The
+    user is read from the database, as the user cache holds no password
+    hashes.
+    """
+    result = await db.exec(select(User).where(User.username == username))
+    user = result.one_or_none()
 
     if (
         not user
         or not user.hashed_password
-        or not verify_password(password, user.hashed_password)
+        or not await hasher.verify(password, user.hashed_password)
     ):
         raise AuthenticationException(detail="Incorrect username or password")
 
     if not user.is_active:
         raise InactiveUserException()
 
+    if hasher.needs_rehash(user.hashed_password):
+        _schedule_rehash(user, password)
+
     return user
 
 
-def create_user_access_token(username: str, role: UserRole) -> str:
-    """Create access token for user with role."""
+def create_user_access_token(user_id: str, username: str, role: UserRole) -> str:
+    """Create access token for user with role and the role's permission mask."""
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": username, "role": role.value}, expires_delta=access_token_expires
+        data={
+            "sub": username,
+            "uid": user_id,
+            "role": role.value,
+            "perm": int(ROLE_PERMISSIONS[role]),
+        },
+        expires_delta=access_token_expires,
     )
     return access_token
 
 
-def create_user_refresh_token(username: str) -> str:
-    """Create refresh token for user."""
+def create_user_refresh_token(username: str, session_id: str) -> str:
+    """Create refresh token for user bound to a refresh session."""
     refresh_token_expires = timedelta(days=settings.refresh_token_expire_days)
     refresh_token = create_refresh_token(
-        data={"sub": username}, expires_delta=refresh_token_expires
+        data={"sub": username, "sid": session_id}, expires_delta=refresh_token_expires
     )
     return refresh_token
 
 
-async def create_tokens_for_user(db: AsyncSession, user: User) -> dict:
-    """Create both access and refresh tokens for user and store refresh token."""
-    access_token = create_user_access_token(user.username, user.role)
-    refresh_token = create_user_refresh_token(user.username)
+def _open_refresh_session(db: AsyncSession, user: User, device: str | None) -> str:
+    """Add a new refresh session for user and return its refresh token."""
+    session_id = str(ULID())
+    refresh_token = create_user_refresh_token(user.username, session_id)
+    now = datetime.now(timezone.utc)
+    db.add(
+        RefreshSession(
+            id=session_id,
+            user_id=user.id,
+            token_hash=hash_token(refresh_token),
+            device=device[:255] if device else None,
+            created_at=now,
+            expires_at=now + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    return refresh_token
+
 
-    # Store refresh token in database
-    user.refresh_token = refresh_token
+async def create_tokens_for_user(
+    db: AsyncSession, user: User, device: str | None = None
+) -> dict:
+    """Create both access and refresh tokens for user and open a refresh session."""
+    access_token = create_user_access_token(user.id, user.username, user.role)
+    refresh_token = _open_refresh_session(db, user, device)
     await db.commit()
 
     return {
@@ -129,34 +284,145 @@ async def create_tokens_for_user(db: AsyncSession, user: User) -> dict:
     }
 
 
+async def _revoke_sessions_on_reuse(db: AsyncSession, token_hash: str):
+    """
+    Revoke every session of a user whose rotated refresh token was replayed.
+
+    A token reused shortly after rotation is most likely a concurrent
+    refresh from another tab, so it is only rejected, not treated as theft.
+    Tokens of sessions ended any other way (e.g. logout) are just rejected.
+    """
+    result = await db.exec(
+        select(
+            RefreshSession.user_id,
+            RefreshSession.revoked_at,
+            RefreshSession.revoked_reason,
+        ).where(RefreshSession.token_hash == token_hash)
+    )
+    session = result.one_or_none()
+    if session is None or session.revoked_reason != RevocationReason.ROTATED:
+        return
+
+    now = datetime.now(timezone.utc)
+    grace = timedelta(seconds=settings.refresh_token_reuse_grace_seconds)
+    if now - session.revoked_at < grace:
+        return
+
+    await db.exec(
+        update(RefreshSession)
+        .where(
+            col(RefreshSession.user_id) == session.user_id,
+            col(RefreshSession.revoked_at).is_(None),
+        )
+        .values(revoked_at=now, revoked_reason=RevocationReason.SIGNED_OUT)
+    )
+    await db.commit()
+    await revocations.revoke_users([session.user_id])
+    logger.warning(
+        f"Refresh token reuse detected, revoked all sessions of user {session.user_id}"
+    )
+
+
 async def refresh_access_token(db: AsyncSession, refresh_token: str) -> dict:
-    """Generate new access token from refresh token."""
+    """
+    Rotate a refresh token.
+
+    The session it belongs to is revoked and a new session with a new
+    refresh token is issued alongside the access token.
+    """
     payload = decode_refresh_token(refresh_token)
     if payload is None:
         raise AuthenticationException(detail="Invalid refresh token")
 
-    username: str | None = payload.get("sub")  # type: ignore[assignment]
-    if username is None:
+    token_hash = hash_token(refresh_token)
+    now = datetime.now(timezone.utc)
+    result = await db.exec(
+        update(RefreshSession)
+        .where(
+            col(RefreshSession.token_hash) == token_hash,
+            col(RefreshSession.revoked_at).is_(None),
+            col(RefreshSession.expires_at) > now,
+        )
+        .values(revoked_at=now, revoked_reason=RevocationReason.ROTATED)
+        .returning(RefreshSession.user_id, RefreshSession.device)
+    )
+    session = result.one_or_none()
+    if session is None:
+        await _revoke_sessions_on_reuse(db, token_hash)
         raise AuthenticationException(detail="Invalid refresh token")
 
-    user = await get_user_by_username(db, username)
-    if user is None or user.refresh_token != refresh_token:
+    user = await get_user_by_id(db, session.user_id)
+    if user is None:
         raise AuthenticationException(detail="Invalid refresh token")
 
     if not user.is_active:
         raise InactiveUserException()
 
-    # Create new access token
-    access_token = create_user_access_token(user.username, user.role)
+    access_token = create_user_access_token(user.id, user.username, user.role)
+    new_refresh_token = _open_refresh_session(db, user, session.device)
+    await db.commit()
 
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": access_token,
+        "refresh_token": new_refresh_token,
+        "token_type": "bearer",
+    }
 
 
-async def get_current_user_from_token(db: AsyncSession, token: str) -> User:
-    """Get current user from JWT token."""
+async def revoke_refresh_token(
+    db: AsyncSession, refresh_token: str, access_token: str | None = None
+):
+    """
+    Revoke the refresh session a refresh token belongs to (logout).
+
+    The access token issued with it, if given, is revoked as well.
+    """
+    await db.exec(
+        update(RefreshSession)
+        .where(
+            col(RefreshSession.token_hash) == hash_token(refresh_token),
+            col(RefreshSession.revoked_at).is_(None),
+        )
+        .values(
+            revoked_at=datetime.now(timezone.utc),
+            revoked_reason=RevocationReason.LOGOUT,
+        )
+    )
+    await db.commit()
+
+    payload = decode_access_token(access_token) if access_token else None
+    if payload is not None and "jti" in payload:
+        await revocations.revoke_token(payload["jti"], payload["exp"])
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id: str):
+    """Sign a user out everywhere: end refresh sessions, revoke access tokens."""
+    await db.exec(
+        update(RefreshSession)
+        .where(
+            col(RefreshSession.user_id) == user_id,
+            col(RefreshSession.revoked_at).is_(None),
+        )
+        .values(
+            revoked_at=datetime.now(timezone.utc),
+            revoked_reason=RevocationReason.SIGNED_OUT,
+        )
+    )
+    await db.commit()
+    await revocations.revoke_users([user_id])
+
+
+async def _verified_payload(token: str) -> dict:
+    """Verify an access token and check that it has not been revoked."""
     payload = decode_access_token(token)
-    if payload is None:
+    if payload is None or await revocations.is_revoked(payload):
         raise AuthenticationException()
+    return payload
+
+
+async def get_current_user_from_token(db: AsyncSession, token: str) -> User:
+    """Get current user from JWT token."""
+    payload = await _verified_payload(token)
 
     username: str | None = payload.get("sub")  # type: ignore[assignment]
     if username is None:
@@ -177,9 +443,30 @@ async def get_current_user(
     return await get_current_user_from_token(db, token)
 
 
+async def get_current_principal(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    db: AsyncSession = Depends(get_db),
+) -> User | Principal:
+    """
+    FastAPI dependency for authorization-only endpoints.
+
+    With `auth_stateless_principal` enabled the principal is built from the
+    token claims without touching the database, so role or activation
+    changes only take effect once the access token expires. Otherwise (or
+    for tokens issued without the needed claims) the full user is loaded.
+    """
+    if settings.auth_stateless_principal:
+        payload = await _verified_payload(token)
+        principal = Principal.from_claims(payload)
+        if principal is not None:
+            return principal
+
+    return await get_current_user_from_token(db, token)
+
+
 async def get_current_admin(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[User | Principal, Depends(get_current_principal)],
+) -> User | Principal:
     """FastAPI dependency to verify user is an admin."""
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
@@ -190,10 +477,10 @@ async def get_current_admin(
 
 
 async def get_current_moderator(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
+    current_user: Annotated[User | Principal, Depends(get_current_principal)],
+) -> User | Principal:
     """FastAPI dependency to verify user is a moderator or admin."""
-    if current_user.role not in [UserRole.MODERATOR, UserRole.ADMIN]:
+    if not current_user.has_role(UserRole.MODERATOR):
         raise HTTPException(
             status_code=http_status.HTTP_403_FORBIDDEN,
             detail="Moderator or admin access required",
@@ -205,8 +492,8 @@ def require_role(required_role: UserRole):
     """Factory function to create a role check dependency."""
 
     async def role_checker(
-        current_user: Annotated[User, Depends(get_current_user)],
-    ) -> User:
+        current_user: Annotated[User | Principal, Depends(get_current_principal)],
+    ) -> User | Principal:
         if not current_user.has_role(required_role):
             raise HTTPException(
                 status_code=http_status.HTTP_403_FORBIDDEN,
@@ -217,6 +504,31 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
+def require_permissions(*required: Permission):
+    """
+    Factory function to create a permission check dependency.
+
+    The principal must hold every permission given. With stateless
+    principals the check is one AND against the token's `perm` claim.
+    """
+    mask = Permission(0)
+    for permission in required:
+        mask |= permission
+    mask_value = int(mask)
+
+    async def permission_checker(
+        current_user: Annotated[User | Principal, Depends(get_current_principal)],
+    ) -> User | Principal:
+        if current_user.permissions & mask_value != mask_value:
+            raise HTTPException(
+                status_code=http_status.HTTP_403_FORBIDDEN,
+                detail=f"Permission {mask.name} required",
+            )
+        return current_user
+
+    return permission_checker
+
+
 async def update_user_profile(
     db: AsyncSession, user: User, full_name: str | None, avatar_url: str | None
 ) -> User:
@@ -225,11 +537,36 @@ async def update_user_profile(
 
     Only updates provided fields (full_name, avatar_url).
     """
+    values = {}
     if full_name is not None:
-        user.full_name = full_name
+        values["full_name"] = full_name
     if avatar_url is not None:
-        user.avatar_url = avatar_url
+        values["avatar_url"] = avatar_url
+    if not values:
+        return user
+
+    result = await db.exec(
+        update(User).where(User.id == user.id).values(**values).returning(User)
+    )
+    updated_user = result.scalars().one()
+    await db.commit()
+    await user_cache.invalidate_user(updated_user)
+    return updated_user
+
+
+async def update_user_role(
+    db: AsyncSession, user_id: str, role: UserRole
+) -> User | None:
+    """Change a user's role. Returns None if the user does not exist."""
+    result = await db.exec(
+        update(User).where(User.id == user_id).values(role=role).returning(User)
+    )
+    user = result.scalars().one_or_none()
+    if user is None:
+        return None
 
     await db.commit()
-    await db.refresh(user)
+    await user_cache.invalidate_user(user)
+    # Outstanding access tokens still carry the old role
+    await revocations.revoke_users([user.id])
     return user
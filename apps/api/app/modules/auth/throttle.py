@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import math
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.exceptions import TooManyRequestsException
+from app.core.metrics import metrics
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Takes a token from every bucket in KEYS, or from none of them. ARGV holds
+# (capacity, refill rate per second) for each key. Returns nothing when
+# allowed, otherwise the seconds each bucket needs to refill one token
+# ("0" for the buckets that are not empty).
+TAKE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local levels = {}
+local waits = {}
+local blocked = false
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local elapsed = math.max(0, now - (tonumber(state[2]) or now))
+    level = math.min(capacity, level + elapsed * rate)
+    levels[i] = level
+    waits[i] = '0'
+    if level < 1 then
+        waits[i] = tostring((1 - level) / rate)
+        blocked = true
+    end
+end
+if blocked then
+    return waits
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local rate = tonumber(ARGV[i * 2])
+    local level = levels[i] - 1
+    redis.call('HSET', key, 'tokens', tostring(level), 'ts', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - level) / rate * 1000))
+end
+return {}
+"""
+
+# Gives one token back to every existing bucket in KEYS, up to its capacity
+# (ARGV as for TAKE_SCRIPT)
+REFUND_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2 - 1])
+    local level = tonumber(redis.call('HGET', key, 'tokens'))
+    if level then
+        redis.call('HSET', key, 'tokens', tostring(math.min(capacity, level + 1)))
+    end
+end
+return 0
+"""
+
+
+class LoginThrottle:
+    """
+    Token buckets limiting password login attempts per client IP and per
+    username.
+
+    Buckets live in Redis and are updated by Lua scripts, so every replica
+    shares them and a check-and-take is atomic. A rejected key is also
+    remembered in process until its retry time, so an attacker hammering
+    one replica is turned away without a Redis round trip. Successful
+    logins refund their tokens: legitimate users behind a shared address
+    keep signing in while the bucket absorbs failed guesses.
+
+    Checks happen before any database or hashing work. If Redis is
+    unavailable the throttle fails open and only the local filter applies.
+    """
+
+    def __init__(self):
+        self.redis: Redis | None = None
+        self._blocked = LRUCache("login_throttle", settings.login_throttle_local_size)
+        self._rejected = {
+            source: metrics.counter(
+                "login_throttled_total",
+                "Login attempts rejected by the throttle",
+                labels={"source": source},
+            )
+            for source in ("local", "redis")
+        }
+
+    async def initialize(self):
+        if not settings.login_throttle_enabled:
+            return
+        self.redis = Redis.from_url(settings.redis_url)
+        self._take = self.redis.register_script(TAKE_SCRIPT)
+        self._refund = self.redis.register_script(REFUND_SCRIPT)
+
+    @staticmethod
+    def _buckets(client_ip: str, username: str) -> list[tuple[str, int, float]]:
+        """(key, capacity, refill per second) for each bucket of an attempt."""
+        # Usernames are attacker-controlled, so keys hold a digest of them
+        digest = hashlib.sha256(username.strip().lower().encode("utf-8")).hexdigest()
+        return [
+            (
+                f"login-throttle:ip:{client_ip}",
+                settings.login_throttle_ip_burst,
+                settings.login_throttle_ip_per_minute / 60,
+            ),
+            (
+                f"login-throttle:user:{digest[:32]}",
+                settings.login_throttle_username_burst,
+                settings.login_throttle_username_per_minute / 60,
+            ),
+        ]
+
+    @staticmethod
+    def _args(buckets: list[tuple[str, int, float]]) -> list[float]:
+        return [value for _, capacity, rate in buckets for value in (capacity, rate)]
+
+    def _reject(self, source: str, retry_after: float):
+        self._rejected[source].inc()
+        raise TooManyRequestsException(
+            detail="Too many login attempts, please retry later",
+            retry_after=max(1, math.ceil(retry_after)),
+        )
+
+    async def check(self, client_ip: str, username: str):
+        """Take a login attempt from the buckets, or raise a 429."""
+        if self.redis is None:
+            return
+
+        buckets = self._buckets(client_ip, username)
+        now = time.time()
+        for key, _, _ in buckets:
+            blocked_until = self._blocked.get(key)
+            if blocked_until is not None:
+                self._reject("local", blocked_until - now)
+
+        keys = [key for key, _, _ in buckets]
+        try:
+            waits = await self._take(keys=keys, args=self._args(buckets))
+        except RedisError as e:
+            logger.warning(f"Login throttle check failed: {e}")
+            return
+        if waits:
+            waits = [float(wait) for wait in waits]
+            for key, wait in zip(keys, waits):
+                if wait > 0:
+                    self._blocked.set(key, now + wait, now + wait)
+            self._reject("redis", max(waits))
+
+    async def succeeded(self, client_ip: str, username: str):
+        """Give back the tokens of a successful login."""
+        if self.redis is None:
+            return
+        buckets = self._buckets(client_ip, username)
+        try:
+            await self._refund(
+                keys=[key for key, _, _ in buckets], args=self._args(buckets)
+            )
+        except RedisError as e:
+            logger.warning(f"Login throttle refund failed: {e}")
+
+    async def cleanup(self):
+        if self.redis:
+            await self.redis.aclose()
+            self.redis = None
+        self._blocked.clear()
+
+
+login_throttle = LoginThrottle()
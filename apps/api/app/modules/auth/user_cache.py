@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from uuid import uuid4
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.cache import LRUCache
+from app.core.settings import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "auth:user-cache:invalidate"
+
+# Users are stored as a JSON array in this field order. The key prefix is
+# derived from it, so a schema change never reads entries of another layout.
+# Password hashes stay in the database: the login path reads them directly.
+_FIELDS = tuple(field for field in User.model_fields if field != "hashed_password")
+_KEY_PREFIX = "user:" + hashlib.sha1(",".join(_FIELDS).encode()).hexdigest()[:8]
+_VERSION_PREFIX = "user-version"
+LOOKUP_FIELDS = ("id", "username", "email")
+
+# Stores users only if their lookup key was not invalidated since the
+# caller read its version. Per user, KEYS holds the version key followed by
+# the user's cache keys, and ARGV (after the TTL) the version read before
+# loading ("" for none) and the serialized user. Returns 1 per stored user.
+SET_SCRIPT = """
+local ttl = ARGV[1]
+local stored = {}
+for i = 1, #KEYS / 4 do
+    local version = redis.call('GET', KEYS[i * 4 - 3]) or ''
+    stored[i] = 0
+    if version == ARGV[i * 2] then
+        for j = i * 4 - 2, i * 4 do
+            redis.call('SET', KEYS[j], ARGV[i * 2 + 1], 'EX', ttl)
+        end
+        stored[i] = 1
+    end
+end
+return stored
+"""
+
+
+def _serialize(user: User) -> bytes:
+    return json.dumps(
+        [getattr(user, field) for field in _FIELDS], separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _deserialize(data: bytes) -> User:
+    return User.model_validate(dict(zip(_FIELDS, json.loads(data))))
+
+
+class UserCache:
+    """
+    Two-tier read-through cache for user lookups.
+
+    An in-process LRU sits in front of a shared Redis layer. Each user is
+    stored once per lookup field (id, username, email) with a TTL. Writes
+    call `invalidate()`, which drops the Redis keys and broadcasts the keys
+    over Redis Pub/Sub so every API replica evicts its local copy.
+
+    Invalidation also replaces a version stamp on each lookup key. Loaders
+    read the versions before querying the database and the write-back is
+    skipped if they changed, so a reader that loaded a row just before an
+    UPDATE committed cannot put the old row back after its invalidation.
+
+    The cache stays disabled until `initialize()` runs in the app lifespan,
+    so CLI commands and workers always read from the database. Cached users
+    are detached copies without `hashed_password`: write paths must use
+    UPDATE statements, not attribute assignment on the returned object.
+    """
+
+    def __init__(self):
+        self.redis: Redis | None = None
+        self._local = LRUCache("user", settings.user_cache_local_size)
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.redis is not None
+
+    async def initialize(self):
+        """Connect to Redis and start the invalidation listener."""
+        if not settings.user_cache_enabled:
+            return
+        self.redis = Redis.from_url(settings.redis_url)
+        self._set = self.redis.register_script(SET_SCRIPT)
+        self._listener = asyncio.create_task(self._listen())
+
+    @staticmethod
+    def key(field: str, value: str) -> str:
+        return f"{_KEY_PREFIX}:{field}:{value}"
+
+    @staticmethod
+    def version_key(field: str, value: str) -> str:
+        return f"{_VERSION_PREFIX}:{field}:{value}"
+
+    async def versions(self, field: str, values: list[str]) -> dict[tuple, str]:
+        """
+        Read the versions of lookup keys, keyed by (field, value).
+
+        Call before loading the users from the database and pass the result
+        to `set()` / `set_many()`. Empty when the cache is unavailable, in
+        which case nothing is written back.
+        """
+        if self.redis is None or not values:
+            return {}
+        try:
+            stamps = await self.redis.mget(
+                [self.version_key(field, value) for value in values]
+            )
+        except RedisError as e:
+            logger.warning(f"User cache read failed: {e}")
+            return {}
+        return {
+            (field, value): stamp.decode() if stamp is not None else ""
+            for value, stamp in zip(values, stamps)
+        }
+
+    async def get(self, field: str, value: str) -> User | None:
+        """Return a cached user by lookup field, or None on a miss."""
+        if self.redis is None:
+            return None
+
+        key = self.key(field, value)
+        data = self._local.get(key)
+        if data is None:
+            try:
+                data = await self.redis.get(key)
+            except RedisError as e:
+                logger.warning(f"User cache read failed: {e}")
+                return None
+            if data is None:
+                return None
+            self._local.set(
+                key, data, time.time() + settings.user_cache_local_ttl_seconds
+            )
+        return _deserialize(data)
+
+    async def get_many(self, field: str, values: list[str]) -> dict[str, User]:
+        """Return cached users keyed by lookup value; misses are left out."""
+        if self.redis is None or not values:
+            return {}
+
+        found = {}
+        remote = []
+        for value in values:
+            data = self._local.get(self.key(field, value))
+            if data is None:
+                remote.append(value)
+            else:
+                found[value] = data
+
+        if remote:
+            keys = [self.key(field, value) for value in remote]
+            try:
+                cached = await self.redis.mget(keys)
+            except RedisError as e:
+                logger.warning(f"User cache read failed: {e}")
+                cached = [None] * len(keys)
+            local_expiry = time.time() + settings.user_cache_local_ttl_seconds
+            for value, key, data in zip(remote, keys, cached):
+                if data is not None:
+                    self._local.set(key, data, local_expiry)
+                    found[value] = data
+
+        return {value: _deserialize(data) for value, data in found.items()}
+
+    async def set(self, user: User, versions: dict[tuple, str]):
+        """Store a user under all of its lookup keys (see `versions()`)."""
+        await self.set_many([user], versions)
+
+    async def set_many(self, users: list[User], versions: dict[tuple, str]):
+        """
+        Store users under all of their lookup keys in one round trip.
+
+        A user is stored only if the lookup key it was loaded by still has
+        the version read beforehand; users without a known version are
+        skipped.
+        """
+        if self.redis is None:
+            return
+
+        keys = []
+        args: list = [settings.user_cache_ttl_seconds]
+        local = []
+        for user in users:
+            lookup = next(
+                (
+                    (field, getattr(user, field))
+                    for field in LOOKUP_FIELDS
+                    if (field, getattr(user, field)) in versions
+                ),
+                None,
+            )
+            if lookup is None:
+                continue
+            data = _serialize(user)
+            user_keys = [
+                self.key(field, getattr(user, field)) for field in LOOKUP_FIELDS
+            ]
+            keys += [self.version_key(*lookup), *user_keys]
+            args += [versions[lookup], data]
+            local.append((user_keys, data))
+        if not local:
+            return
+
+        # Cached locally first, so an invalidation arriving while the script
+        # runs still evicts it
+        local_expiry = time.time() + settings.user_cache_local_ttl_seconds
+        for user_keys, data in local:
+            for key in user_keys:
+                self._local.set(key, data, local_expiry)
+        try:
+            stored = await self._set(keys=keys, args=args)
+        except RedisError as e:
+            logger.warning(f"User cache write failed: {e}")
+            stored = [0] * len(local)
+        for (user_keys, _), was_stored in zip(local, stored):
+            if not was_stored:
+                for key in user_keys:
+                    self._local.delete(key)
+
+    async def invalidate(self, user_id: str, username: str, email: str):
+        """Evict a user everywhere (call after the write has committed)."""
+        await self.invalidate_many([(user_id, username, email)])
+
+    async def invalidate_many(self, users: list[tuple[str, str, str]]):
+        """Evict many (id, username, email) users with one Redis round trip."""
+        if self.redis is None or not users:
+            return
+
+        keys = [
+            self.key(field, value)
+            for user in users
+            for field, value in zip(LOOKUP_FIELDS, user)
+        ]
+        for key in keys:
+            self._local.delete(key)
+        # A fresh random version, so a loader holding any earlier one skips
+        # its write-back
+        version = uuid4().hex
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user in users:
+                    for field, value in zip(LOOKUP_FIELDS, user):
+                        pipe.set(
+                            self.version_key(field, value),
+                            version,
+                            ex=settings.user_cache_ttl_seconds,
+                        )
+                pipe.delete(*keys)
+                pipe.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"User cache invalidation failed: {e}")
+
+    async def invalidate_user(self, user: User):
+        await self.invalidate(user.id, user.username, user.email)
+
+    async def _listen(self):
+        """Evict local entries invalidated by other replicas."""
+        while True:
+            pubsub_redis = Redis.from_url(settings.redis_url)
+            pubsub = pubsub_redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # Messages may have been missed while (re)connecting
+                self._local.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        for key in json.loads(message["data"]):
+                            self._local.delete(key)
+            except asyncio.CancelledError:
+                raise
+            # The listener must outlive any failure, including malformed
+            # messages; it resubscribes and clears the local tier after errors
+            except Exception as e:  # noqa: BLE001
+                logger.error(f"User cache invalidation listener failed: {e}")
+                self._local.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await pubsub_redis.aclose()
+
+    async def cleanup(self):
+        """Stop the listener and close the Redis connection."""
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        if self.redis:
+            await self.redis.aclose()
+            self.redis = None
+        self._local.clear()
+
+
+user_cache = UserCache()
@@ -1,3 +1,5 @@
 from app.tasks.example import send_email
+from app.tasks.keys import rotate_signing_keys
+from app.tasks.sessions import purge_expired_sessions
 
-__all__ = ["send_email"]
+__all__ = ["send_email", "purge_expired_sessions", "rotate_signing_keys"]
@@ -0,0 +1,57 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlmodel import Session, col, delete, func, select
+
+from app.core.celery import celery_app
+from app.core.keyring import (
+    SIGNING_KEYS_LOCK,
+    generate_signing_key,
+    keyring,
+    plan_rotation,
+)
+from app.core.settings import settings
+from app.models.signing_key import SigningKey
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="rotate_signing_keys")
+def rotate_signing_keys() -> dict:
+    """
+    Rotate the JWT signing keys.
+
+    A new key is generated ahead of time and only published in the JWKS
+    for `jwt_key_publish_hours`, so API replicas and downstream services
+    have it before it starts signing. Keys are deleted once no token
+    signed with them can still be valid.
+
+    Returns:
+        dict with the new key id (if any) and the deleted key ids
+    """
+    if not keyring.enabled:
+        return {"status": "skipped", "reason": f"{settings.algorithm} uses secret_key"}
+
+    engine = create_engine(settings.database_url.replace("+asyncpg", "+psycopg2"))
+    now = datetime.now(timezone.utc)
+    created = None
+
+    try:
+        with Session(engine) as session:
+            session.exec(select(func.pg_advisory_xact_lock(SIGNING_KEYS_LOCK)))
+            keys = list(session.exec(select(SigningKey)).all())
+            due, expired = plan_rotation(keys, now)
+            if due:
+                lead = timedelta(hours=settings.jwt_key_publish_hours)
+                key = generate_signing_key(activates_at=now + lead)
+                session.add(key)
+                created = key.kid
+            if expired:
+                session.exec(delete(SigningKey).where(col(SigningKey.kid).in_(expired)))
+            session.commit()
+    finally:
+        engine.dispose()
+
+    logger.info(f"Signing key rotation: created {created}, deleted {expired}")
+    return {"status": "success", "created": created, "deleted": expired}
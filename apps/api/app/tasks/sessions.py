@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlmodel import col, delete, select
+
+from app.core.celery import celery_app
+from app.core.settings import settings
+from app.models.session import RefreshSession
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="purge_expired_sessions")
+def purge_expired_sessions(batch_size: int = 5000) -> dict:
+    """
+    Delete expired refresh sessions in batches.
+
+    Revoked sessions are kept until they expire so that replayed refresh
+    tokens can still be recognised. Each batch runs in its own short
+    transaction to avoid long locks on the table.
+
+    Args:
+        batch_size: Maximum number of rows deleted per transaction
+
+    Returns:
+        dict with the number of deleted sessions
+    """
+    engine = create_engine(settings.database_url.replace("+asyncpg", "+psycopg2"))
+    now = datetime.now(timezone.utc)
+    deleted = 0
+
+    try:
+        while True:
+            expired_ids = (
+                select(RefreshSession.id)
+                .where(col(RefreshSession.expires_at) < now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            with engine.begin() as conn:
+                result = conn.execute(
+                    delete(RefreshSession).where(
+                        col(RefreshSession.id).in_(expired_ids)
+                    )
+                )
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+    finally:
+        engine.dispose()
+
+    logger.info(f"Purged {deleted} expired refresh sessions")
+    return {"status": "success", "deleted": deleted}
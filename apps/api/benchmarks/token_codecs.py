@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark the JWT backends behind app.core.jwt_codec.
+
+For every installed backend and algorithm it signs and verifies a token
+shaped like our access tokens, and prints ops/sec plus the memory
+allocated per call. CPython has no cumulative allocation counter, so the
+allocation columns come from tracemalloc: the peak bytes allocated during
+a single call, and the blocks still held after many calls (anything but 0
+means a cache or a leak).
+
+Usage:
+    uv run python -m benchmarks.token_codecs
+    uv run python -m benchmarks.token_codecs --seconds 3 --algorithm ES256
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from app.core.jwt_codec import TokenCodec, available_codecs
+from app.core.keyring import CURVES
+
+SECRET = "benchmark-secret-key-of-a-realistic-length"
+ALGORITHMS = ("HS256", *CURVES)
+
+
+def _claims() -> dict:
+    return {
+        "sub": "benchmark",
+        "uid": "01J0000000000000000000000",
+        "role": "USER",
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
+    }
+
+
+def _keys(codec: TokenCodec, algorithm: str) -> tuple:
+    """(signing key, verification key) in the backend's own format."""
+    if algorithm.startswith("HS"):
+        key = codec.prepare_key(SECRET, algorithm)
+        return key, key
+    private_key = ec.generate_private_key(CURVES[algorithm]())
+    return (
+        codec.prepare_key(private_key, algorithm),
+        codec.prepare_key(private_key.public_key(), algorithm),
+    )
+
+
+def _ops_per_second(call: Callable[[], object], seconds: float) -> float:
+    # Warm up caches before timing
+    for _ in range(10):
+        call()
+    calls = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(50):
+            call()
+        calls += 50
+    return calls / (time.perf_counter() - started)
+
+
+def _allocations(call: Callable[[], object], calls: int = 200) -> tuple[int, float]:
+    """(peak bytes of one call, blocks retained per call over `calls` calls)."""
+    call()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        call()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        for _ in range(calls):
+            call()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak, retained / calls
+
+
+def _run(codec: TokenCodec, algorithm: str, seconds: float):
+    signing_key, verification_key = _keys(codec, algorithm)
+    claims = _claims()
+    headers = {"kid": "benchmark"}
+    token = codec.encode(claims, signing_key, algorithm, headers)
+
+    def encode():
+        return codec.encode(claims, signing_key, algorithm, headers)
+
+    def decode():
+        return codec.decode(token, verification_key, [algorithm])
+
+    for operation, call in (("encode", encode), ("decode", decode)):
+        rate = _ops_per_second(call, seconds)
+        peak, retained = _allocations(call)
+        print(
+            f"{codec.name:<8} {algorithm:<6} {operation:<7} "
+            f"{rate:>11,.0f} {peak / 1024:>11.1f} {retained:>14.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JWT backends")
+    parser.add_argument(
+        "--seconds", type=float, default=1.0, help="Timing per measurement"
+    )
+    parser.add_argument("--algorithm", choices=ALGORITHMS, action="append")
+    parser.add_argument("--backend", action="append", help="Only these backends")
+    args = parser.parse_args()
+
+    codecs = [
+        codec
+        for codec in available_codecs()
+        if not args.backend or codec.name in args.backend
+    ]
+    print(
+        f"{'backend':<8} {'alg':<6} {'op':<7} {'ops/sec':>11} "
+        f"{'peak KiB':>11} {'blocks kept':>14}"
+    )
+    for algorithm in args.algorithm or ("HS256", "ES256"):
+        for codec in codecs:
+            _run(codec, algorithm, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
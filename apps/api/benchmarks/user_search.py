@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the admin user search queries.
+
+Copies the `users` table definition (with all of its indexes) into a
+scratch schema, fills it with synthetic users, then runs every search
+shape used by GET /auth/users/search. For each one it prints the
+EXPLAIN (ANALYZE, BUFFERS) plan and the latency of the real query over
+several runs. The scratch schema is dropped afterwards.
+
+Usage:
+    uv run python -m benchmarks.user_search
+    uv run python -m benchmarks.user_search --users 5000000 --runs 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from app.core.settings import settings
+from app.models.user import UserRole
+from app.modules.auth.admin_service import (
+    USER_LIST_FIELDS,
+    search_filters,
+    users_page_query,
+)
+
+SCHEMA = "bench_user_search"
+
+# Roughly production-like distribution: few staff, few inactive users,
+# a minority of OAuth sign-ups
+SEED_USERS = f"""
+INSERT INTO {SCHEMA}.users
+    (id, email, username, is_active, role, hashed_password, oauth_provider)
+SELECT
+    lpad(i::text, 26, '0'),
+    substr(md5(i::text), 1, 12) || '@example.com',
+    'u_' || substr(md5('u' || i::text), 1, 12),
+    i % 200 <> 0,
+    (CASE WHEN i % 5000 = 0 THEN 'ADMIN'
+          WHEN i % 1000 = 0 THEN 'MODERATOR'
+          ELSE 'USER' END)::userrole,
+    'x',
+    CASE WHEN i % 20 = 0 THEN 'github'
+         WHEN i % 13 = 0 THEN 'google' END
+FROM generate_series(1, :users) AS i
+"""
+
+CASES = [
+    ("role=ADMIN", {"role": UserRole.ADMIN}),
+    ("is_active=false", {"is_active": False}),
+    ("oauth_provider=github", {"oauth_provider": "github"}),
+    ("email prefix 'ab1'", {"email": "ab1"}),
+    ("username prefix 'U_Abc'", {"username": "U_Abc"}),
+    ("email prefix 'a' + is_active=false", {"email": "a", "is_active": False}),
+    (
+        "role=MODERATOR + oauth_provider=google",
+        {"role": UserRole.MODERATOR, "oauth_provider": "google"},
+    ),
+]
+
+
+async def _setup(conn: AsyncConnection, users: int):
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(
+        text(f"CREATE TABLE {SCHEMA}.users (LIKE public.users INCLUDING ALL)")
+    )
+    started = time.perf_counter()
+    await conn.execute(text(SEED_USERS), {"users": users})
+    await conn.execute(text(f"ANALYZE {SCHEMA}.users"))
+    await conn.commit()
+    print(f"Seeded {users:,} users in {time.perf_counter() - started:.1f}s\n")
+
+
+async def _run_case(conn: AsyncConnection, name: str, filters: dict, runs: int):
+    statement = users_page_query(
+        list(USER_LIST_FIELDS), limit=50, filters=search_filters(**filters)
+    )
+    # Compile with the connected dialect so literals are quoted as the
+    # server expects (standard_conforming_strings)
+    sql = statement.compile(
+        dialect=conn.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = await conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await conn.execute(statement)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    print(f"== {name}")
+    for (line,) in plan:
+        print(f"   {line}")
+    print(
+        f"   p50 {statistics.median(timings):.2f} ms, "
+        f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms over {runs} runs\n"
+    )
+
+
+async def run_benchmark(args: argparse.Namespace):
+    engine = create_async_engine(settings.database_url, echo=False)
+    try:
+        async with engine.connect() as conn:
+            await _setup(conn, args.users)
+            await conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+            for name, filters in CASES:
+                await _run_case(conn, name, filters, args.runs)
+            await conn.rollback()
+            if not args.keep:
+                await conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+                await conn.commit()
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark admin user search")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument(
+        "--keep", action="store_true", help=f"Keep the {SCHEMA} schema afterwards"
+    )
+    asyncio.run(run_benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
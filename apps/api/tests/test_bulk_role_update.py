@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.core.settings import settings
+from app.main import app
+from app.models.user import UserRole
+from app.modules.auth.service import create_user_access_token
+
+
+class BulkRoleUpdateFilterTest(unittest.TestCase):
+    """A filter that selects no conditions must not update every user."""
+
+    def setUp(self):
+        # Sign with secret_key and authorize from the token claims, so no
+        # database is needed
+        for name, value in (("algorithm", "HS256"), ("auth_stateless_principal", True)):
+            patcher = patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("app.api.auth.api.bulk_update_role", new_callable=AsyncMock)
+        self.bulk_update_role = patcher.start()
+        self.bulk_update_role.return_value = ([], [])
+        self.addCleanup(patcher.stop)
+
+        token = create_user_access_token("01ADMIN", "admin", UserRole.ADMIN)
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.client = TestClient(app)
+
+    def update(self, body: dict):
+        return self.client.patch("/auth/users/role", headers=self.headers, json=body)
+
+    def test_blank_prefix_filter_is_rejected(self):
+        for criteria in (
+            {"email": ""},
+            {"username": ""},
+            {"email": "", "username": ""},
+        ):
+            with self.subTest(criteria=criteria):
+                response = self.update({"role": "ADMIN", "filter": criteria})
+                self.assertEqual(response.status_code, 400)
+        self.bulk_update_role.assert_not_awaited()
+
+    def test_empty_filter_is_rejected(self):
+        self.assertEqual(self.update({"role": "ADMIN", "filter": {}}).status_code, 400)
+        self.bulk_update_role.assert_not_awaited()
+
+    def test_prefix_filter_is_applied(self):
+        response = self.update({"role": "ADMIN", "filter": {"email": "ops@"}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.bulk_update_role.await_args.kwargs["filters"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
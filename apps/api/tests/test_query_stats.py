@@ -0,0 +1,41 @@
+import sqlite3
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from app.core.query_stats import instrument_engine
+
+
+def _refuse_connection():
+    raise sqlite3.OperationalError("connection refused")
+
+
+class HandleErrorWithoutConnectionTest(unittest.TestCase):
+    """Errors raised before a connection exists must pass through unchanged."""
+
+    def test_refused_connect_raises_operational_error(self):
+        engine = create_engine("sqlite://", creator=_refuse_connection)
+        instrument_engine(engine)
+        with self.assertRaises(OperationalError):
+            engine.connect()
+
+    def test_failed_pre_ping_reconnects(self):
+        engine = create_engine("sqlite://", pool_pre_ping=True)
+        instrument_engine(engine)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        # The pooled connection is dead; pre-ping must discard it and reconnect
+        dead = sqlite3.OperationalError("server closed the connection")
+        with (
+            patch.object(engine.dialect, "do_ping", side_effect=dead),
+            patch.object(engine.dialect, "is_disconnect", return_value=True),
+            engine.connect() as conn,
+        ):
+            self.assertEqual(conn.execute(text("SELECT 1")).scalar(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
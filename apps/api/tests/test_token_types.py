@@ -0,0 +1,49 @@
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+from app.core.security import create_access_token, decode_access_token
+from app.core.settings import settings
+from app.main import app
+from app.modules.auth.service import create_user_refresh_token
+
+
+class RefreshTokenAsBearerTest(unittest.TestCase):
+    """Refresh tokens must not authenticate requests as access tokens."""
+
+    def setUp(self):
+        # Sign with secret_key so no keyring (database) is needed
+        patcher = patch.object(settings, "algorithm", "HS256")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # No lifespan: nothing here may touch the database or Redis
+        self.client = TestClient(app)
+
+    def test_refresh_token_is_not_an_access_token(self):
+        refresh_token = create_user_refresh_token("alice", "01SESSION")
+        self.assertIsNone(decode_access_token(refresh_token))
+
+    def test_access_token_without_revocation_claims_is_rejected(self):
+        self.assertIsNone(decode_access_token(create_access_token({"sub": "alice"})))
+        token = create_access_token({"sub": "alice", "uid": "01USER"})
+        self.assertIsNotNone(decode_access_token(token))
+
+    def test_protected_route_rejects_refresh_token(self):
+        refresh_token = create_user_refresh_token("alice", "01SESSION")
+        response = self.client.get(
+            "/auth/me", headers={"Authorization": f"Bearer {refresh_token}"}
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_stateless_principal_rejects_refresh_token(self):
+        refresh_token = create_user_refresh_token("alice", "01SESSION")
+        with patch.object(settings, "auth_stateless_principal", True):
+            response = self.client.get(
+                "/auth/users", headers={"Authorization": f"Bearer {refresh_token}"}
+            )
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,20 @@
 import type { ApiClient } from "../client";
 import type {
 	AccessTokenResponse,
+	BulkRoleUpdate,
+	BulkRoleUpdateResult,
 	LoginRequest,
 	OAuthUrlResponse,
 	RefreshTokenRequest,
 	Token,
+	UserBatchLookup,
 	UserCreate,
+	UserListParams,
+	UserPage,
 	UserProfileUpdate,
 	UserResponse,
 	UserRole,
+	UserSearchParams,
 } from "../types";
 
 export class AuthApi {
@@ -43,12 +49,27 @@ export class AuthApi {
 			data,
 		);
 
-		this.client.setTokens(response.access_token);
+		this.client.setTokens(response.access_token, response.refresh_token);
 
 		return response;
 	}
 
 	logout(): void {
+		const refreshToken = this.client.getRefreshToken();
+		const accessToken = this.client.getAccessToken();
+		if (refreshToken) {
+			// Revoke the server-side session and the access token; local tokens
+			// are cleared regardless
+			this.client
+				.getRawClient()
+				.post("auth/logout", {
+					json: { refresh_token: refreshToken },
+					headers: accessToken
+						? { Authorization: `Bearer ${accessToken}` }
+						: undefined,
+				})
+				.catch(() => {});
+		}
 		this.client.clearTokens();
 	}
 
@@ -79,8 +100,47 @@ export class AuthApi {
 		return this.client.get("auth/admin/test");
 	}
 
-	async getUsers(): Promise<UserResponse[]> {
-		return this.client.get<UserResponse[]>("auth/users");
+	async getUsers(
+		params: UserListParams = {},
+	): Promise<UserPage<Partial<UserResponse> & Pick<UserResponse, "id">>> {
+		const searchParams: Record<string, string | number> = {};
+		if (params.cursor) searchParams.cursor = params.cursor;
+		if (params.limit) searchParams.limit = params.limit;
+		if (params.fields?.length) searchParams.fields = params.fields.join(",");
+		return this.client.get("auth/users", { searchParams });
+	}
+
+	async searchUsers(
+		params: UserSearchParams = {},
+	): Promise<UserPage<Partial<UserResponse> & Pick<UserResponse, "id">>> {
+		const searchParams: Record<string, string | number | boolean> = {};
+		if (params.role) searchParams.role = params.role;
+		if (params.is_active !== undefined)
+			searchParams.is_active = params.is_active;
+		if (params.oauth_provider)
+			searchParams.oauth_provider = params.oauth_provider;
+		if (params.email) searchParams.email = params.email;
+		if (params.username) searchParams.username = params.username;
+		if (params.cursor) searchParams.cursor = params.cursor;
+		if (params.limit) searchParams.limit = params.limit;
+		if (params.fields?.length) searchParams.fields = params.fields.join(",");
+		return this.client.get("auth/users/search", { searchParams });
+	}
+
+	/** Resolve many users by ID and/or username; the result is keyed by ID */
+	async batchGetUsers(
+		lookup: UserBatchLookup,
+	): Promise<Record<string, UserResponse>> {
+		return this.client.post<Record<string, UserResponse>>(
+			"auth/users/batch",
+			lookup,
+		);
+	}
+
+	async bulkUpdateUserRole(
+		data: BulkRoleUpdate,
+	): Promise<BulkRoleUpdateResult> {
+		return this.client.patch<BulkRoleUpdateResult>("auth/users/role", data);
 	}
 
 	async updateUserRole(userId: string, role: UserRole): Promise<UserResponse> {
@@ -88,4 +148,8 @@ export class AuthApi {
 			role,
 		});
 	}
+
+	async revokeUserTokens(userId: string): Promise<void> {
+		await this.client.post<void>(`auth/users/${userId}/revoke-tokens`);
+	}
 }
@@ -90,10 +90,12 @@ export class ApiClient {
 
 				const data = await response.json<{
 					access_token: string;
+					refresh_token: string;
 					token_type: string;
 				}>();
 
-				this.setTokens(data.access_token);
+				// Refresh tokens are rotated on every use
+				this.setTokens(data.access_token, data.refresh_token);
 
 				return data.access_token;
 			} finally {
@@ -22,6 +22,44 @@ export interface UserResponse extends UserBase {
 	full_name?: string | null;
 }
 
+export interface UserPage<T = UserResponse> {
+	items: T[];
+	next_cursor: string | null;
+	approximate_total: number | null;
+}
+
+export interface UserListParams {
+	cursor?: string;
+	limit?: number;
+	fields?: (keyof UserResponse)[];
+}
+
+export interface UserSearchFilter {
+	role?: UserRole;
+	is_active?: boolean;
+	oauth_provider?: string;
+	/** Case-insensitive email prefix */
+	email?: string;
+	/** Case-insensitive username prefix */
+	username?: string;
+}
+
+export interface UserSearchParams extends UserListParams, UserSearchFilter {}
+
+export interface UserBatchLookup {
+	ids?: string[];
+	usernames?: string[];
+}
+
+export type BulkRoleUpdate =
+	| { role: UserRole; user_ids: string[] }
+	| { role: UserRole; filter: UserSearchFilter };
+
+export interface BulkRoleUpdateResult {
+	updated: string[];
+	not_found: string[];
+}
+
 export interface Token {
 	access_token: string;
 	refresh_token: string;
@@ -38,6 +76,7 @@ export interface RefreshTokenRequest {
 
 export interface AccessTokenResponse {
 	access_token: string;
+	refresh_token: string;
 	token_type: string;
 }
 